@@ -1,16 +1,36 @@
-from fastapi import FastAPI, HTTPException
+import base64
+import hashlib
+import html
+import json
+import re
+import threading
+import time
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import sqlite3
 from datetime import datetime, timedelta
-from backend.database import DB_PATH
+from backend.database import DB_PATH, read_generation
+from backend.readers import ReaderPool, Overloaded
 
-app = FastAPI()
+# Endpoints are async: cache hits are answered on the event loop and
+# database work goes to the reader threads
+reader_pool = ReaderPool()
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    reader_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 TIMEFRAME_DAYS = {
@@ -20,25 +40,97 @@ TIMEFRAME_DAYS = {
     '1y': 365
 }
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+SUMMARY_QUERY = '''SELECT summary_text, article_count, generated_at
+                   FROM summaries
+                   WHERE timeframe = ?
+                   ORDER BY generated_at DESC
+                   LIMIT 1'''
+
+ARTICLES_OFFSET_QUERY = '''SELECT id, title, url, source_name, published_at, source_type, summary
+                           FROM articles
+                           WHERE published_at > ?
+                           ORDER BY published_at DESC, id DESC
+                           LIMIT ? OFFSET ?'''
+
+# Seeks straight past the last row seen, via idx_articles_listing
+ARTICLES_KEYSET_QUERY = '''SELECT id, title, url, source_name, published_at, source_type, summary
+                           FROM articles
+                           WHERE published_at > ? AND (published_at, id) < (?, ?)
+                           ORDER BY published_at DESC, id DESC
+                           LIMIT ?'''
+
+# Response cache. Within CACHE_TTL seconds an entry is served without touching
+# the database; after that the DB generation (bumped by the scraper and
+# summarizer) is checked and the entry kept if nothing changed. Entries are
+# rebuilt after CACHE_MAX_AGE regardless, since timeframe windows slide.
+CACHE_TTL = 5
+CACHE_MAX_AGE = 300
+CACHE_MAX_ENTRIES = 1024
+
+CacheEntry = namedtuple('CacheEntry', 'generation built_at checked_at etag body headers')
+_cache = {}
+_cache_lock = threading.Lock()
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def _etag_matches(request, etag):
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    return header.strip() == '*' or etag in (tag.strip().removeprefix('W/') for tag in header.split(','))
+
+def _refresh(conn, entry, build, now):
+    # Runs on a reader thread: revalidate *entry* or build a new one
+    generation = read_generation(conn)
+    if entry is not None and entry.generation == generation and now - entry.built_at < CACHE_MAX_AGE:
+        return entry._replace(checked_at=now)
+    payload, headers = build(conn)
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return CacheEntry(generation, now, now, etag, body, headers)
+
+async def cached_response(request, key, build):
+    """Serve ``build(conn) -> (payload, headers)`` from the response cache.
+
+    *key* identifies the endpoint and its parameters; the DB path is added
+    so different databases never share entries. Honours ``If-None-Match``.
+    Answers 503 when the reader pool is saturated and 504 when the query
+    times out.
+    """
+    key = (DB_PATH, *key)
+    now = time.monotonic()
+    entry = _cache.get(key)
+    if entry is None or now - entry.checked_at >= CACHE_TTL:
+        try:
+            entry = await reader_pool.run(DB_PATH, _refresh, entry, build, now)
+        except Overloaded:
+            raise HTTPException(status_code=503, detail="Server busy", headers={'Retry-After': '1'})
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail="Database query timed out")
+        with _cache_lock:
+            _cache.pop(key, None)
+            _cache[key] = entry
+            while len(_cache) > CACHE_MAX_ENTRIES:
+                del _cache[next(iter(_cache))]
+
+    headers = {'ETag': entry.etag, **entry.headers}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type='application/json', headers=headers)
 
 @app.get("/summaries/{timeframe}")
-def get_summary(timeframe: str):
+async def get_summary(timeframe: str, request: Request):
     """Get latest summary for timeframe (1d, 7d, 30d, 1y)"""
-    conn = get_db_connection()
+    return await cached_response(request, ('summaries', timeframe), lambda conn: _query_summary(conn, timeframe))
+
+def _query_summary(conn, timeframe):
     c = conn.cursor()
     
-    c.execute('''SELECT summary_text, article_count, generated_at
-                 FROM summaries
-                 WHERE timeframe = ?
-                 ORDER BY generated_at DESC
-                 LIMIT 1''', (timeframe,))
+    c.execute(SUMMARY_QUERY, (timeframe,))
     
     result = c.fetchone()
-    conn.close()
     
     if result:
         return {
@@ -46,30 +138,58 @@ def get_summary(timeframe: str):
             "summary": result['summary_text'],
             "article_count": result['article_count'],
             "generated_at": result['generated_at']
-        }
-    return {"error": "No summary found", "timeframe": timeframe}
+        }, {}
+    return {"error": "No summary found", "timeframe": timeframe}, {}
+
+def encode_cursor(published_at, article_id):
+    """Opaque keyset cursor for the row after ``(published_at, id)``."""
+    raw = json.dumps([published_at, article_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        published_at, article_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(published_at, str) or not isinstance(article_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return published_at, article_id
 
 @app.get("/articles/{timeframe}")
-def get_articles(timeframe: str, page: int = 1, limit: int = 20):
-    """Get articles for specific timeframe with pagination"""
+async def get_articles(timeframe: str, request: Request, page: int = 1, limit: int = 20,
+                       cursor: Optional[str] = None):
+    """Get articles for specific timeframe with pagination.
+
+    Pass the ``X-Next-Cursor`` header of a response back as ``cursor`` to
+    fetch the following page by keyset (constant cost however deep);
+    ``page`` is kept for offset-based clients.
+    """
     if timeframe not in TIMEFRAME_DAYS:
         raise HTTPException(status_code=400, detail="Invalid timeframe")
-    
+    position = decode_cursor(cursor) if cursor else None
+    return await cached_response(request, ('articles', timeframe, page, limit, position),
+                                 lambda conn: _query_articles(conn, timeframe, page, limit, position))
+
+def _query_articles(conn, timeframe, page, limit, position):
     days = TIMEFRAME_DAYS[timeframe]
-    conn = get_db_connection()
     c = conn.cursor()
     
     cutoff = datetime.now() - timedelta(days=days)
-    offset = (page - 1) * limit
-    
-    c.execute('''SELECT id, title, url, source_name, published_at, source_type, summary
-                 FROM articles
-                 WHERE published_at > ?
-                 ORDER BY published_at DESC
-                 LIMIT ? OFFSET ?''', (cutoff, limit, offset))
+
+    if position:
+        published_at, article_id = position
+        c.execute(ARTICLES_KEYSET_QUERY, (cutoff, published_at, article_id, limit))
+    else:
+        offset = (page - 1) * limit
+        c.execute(ARTICLES_OFFSET_QUERY, (cutoff, limit, offset))
     
     articles = c.fetchall()
-    conn.close()
+
+    headers = {}
+    if len(articles) == limit:
+        last = articles[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last['published_at'], last['id'])
     
     return [
         {
@@ -82,4 +202,67 @@ def get_articles(timeframe: str, page: int = 1, limit: int = 20):
             "summary": a['summary']
         }
         for a in articles
-    ]
+    ], headers
+
+# bm25 column weights for (title, content, summary): title hits rank highest
+SEARCH_WEIGHTS = (10.0, 1.0, 3.0)
+SEARCH_MAX_TERMS = 10
+_SEARCH_TOKEN_RE = re.compile(r'\w+')
+# snippet() marks hits with these control characters; the text around them is
+# HTML-escaped before they become <mark> tags
+_HIT_START, _HIT_END = '\x02', '\x03'
+
+def fts_query(q):
+    """Turn free text into an FTS5 MATCH expression (all terms, last one as a prefix).
+
+    Quoting every term keeps FTS5 operators and punctuation in user input
+    from being interpreted as query syntax.
+    """
+    terms = _SEARCH_TOKEN_RE.findall(q.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join([*(f'"{t}"' for t in terms[:-1]), f'"{terms[-1]}"*'])
+
+@app.get("/search")
+async def search_articles(request: Request, q: str, page: int = 1, limit: int = 20):
+    """Full-text search over article titles, content and summaries, best match first."""
+    match = fts_query(q)
+    if match is None:
+        raise HTTPException(status_code=400, detail="Empty search query")
+    return await cached_response(request, ('search', match, page, limit),
+                                 lambda conn: _query_search(conn, match, page, limit))
+
+def _snippet_html(snippet):
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_HIT_START, '<mark>').replace(_HIT_END, '</mark>')
+
+def _query_search(conn, match, page, limit):
+    c = conn.cursor()
+    # The API never migrates the database; a data.db no writer has opened
+    # since the search index was added doesn't have it yet
+    if c.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone() is None:
+        raise HTTPException(status_code=503,
+                            detail="Search index not built yet; run the scraper to migrate the database")
+    offset = (page - 1) * limit
+    weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+    c.execute(f'''SELECT a.id, a.title, a.url, a.source_name, a.published_at, a.source_type, a.summary,
+                         snippet(articles_fts, -1, char(2), char(3), '…', 12) AS snippet
+                  FROM articles_fts
+                  JOIN articles a ON a.id = articles_fts.rowid
+                  WHERE articles_fts MATCH ?
+                  ORDER BY bm25(articles_fts, {weights})
+                  LIMIT ? OFFSET ?''', (match, limit, offset))
+    return [
+        {
+            "id": a['id'],
+            "title": a['title'],
+            "url": a['url'],
+            "source": a['source_name'],
+            "published": a['published_at'],
+            "type": a['source_type'],
+            "summary": a['summary'],
+            "snippet": _snippet_html(a['snippet'])
+        }
+        for a in c.fetchall()
+    ], {}
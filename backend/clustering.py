@@ -0,0 +1,105 @@
+import re
+from collections import Counter
+import numpy as np
+
+MAX_FEATURES = 2000      # vocabulary size cap (most frequent terms)
+MAX_CLUSTERS = 5
+MIN_CLUSTER_SIZE = 2
+MAX_ITERATIONS = 50
+SEED = 0                 # fixed so the same window always clusters the same way
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+    a about after all also an and are as at be by can for from has have how in into is it its
+    more new not of on or our over that the their this to up we what when with you your
+    introducing announces announcing blog post update updates news
+""".split())
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall((text or '').lower()) if len(t) > 2 and t not in STOPWORDS]
+
+def tfidf_matrix(documents, max_features=MAX_FEATURES):
+    """L2-normalized TF-IDF matrix (documents x terms) and its vocabulary."""
+    tokenized = [tokenize(doc) for doc in documents]
+    df = Counter(term for tokens in tokenized for term in set(tokens))
+    vocabulary = [term for term, _ in df.most_common(max_features)]
+    index = {term: i for i, term in enumerate(vocabulary)}
+
+    matrix = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, tokens in enumerate(tokenized):
+        for term, count in Counter(tokens).items():
+            if term in index:
+                matrix[row, index[term]] = count
+
+    n = len(documents)
+    idf = np.log((1 + n) / (1 + np.array([df[t] for t in vocabulary], dtype=np.float32))) + 1
+    matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+    return matrix, vocabulary
+
+def _init_centroids(matrix, k, rng):
+    """k-means++ seeding on cosine distance."""
+    centroids = [matrix[rng.integers(len(matrix))]]
+    for _ in range(1, k):
+        distance = 1 - np.max(matrix @ np.array(centroids).T, axis=1)
+        distance = np.clip(distance, 0, None)
+        total = distance.sum()
+        if total == 0:
+            break
+        centroids.append(matrix[rng.choice(len(matrix), p=distance / total)])
+    return np.array(centroids)
+
+def spherical_kmeans(matrix, k, max_iterations=MAX_ITERATIONS, seed=SEED):
+    """Cluster unit-length rows by cosine similarity. Returns ``(labels, centroids)``."""
+    rng = np.random.default_rng(seed)
+    centroids = _init_centroids(matrix, k, rng)
+    labels = np.full(len(matrix), -1)
+    for _ in range(max_iterations):
+        new_labels = np.argmax(matrix @ centroids.T, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(len(centroids)):
+            members = matrix[labels == c]
+            if len(members) == 0:
+                continue
+            centroid = members.sum(axis=0)
+            norm = np.linalg.norm(centroid)
+            centroids[c] = centroid / norm if norm else centroid
+    return labels, centroids
+
+def choose_k(n):
+    """Roughly sqrt(n/2) clusters, between 1 and ``MAX_CLUSTERS``."""
+    return int(min(max(round((n / 2) ** 0.5), 1), MAX_CLUSTERS, n))
+
+def cluster_documents(documents, k=None, top_terms=5):
+    """Group *documents* (strings) into topics.
+
+    Returns a list of ``{'members': [indices], 'terms': [top terms]}``, largest
+    cluster first, with members ordered by closeness to the cluster centre.
+    Clusters smaller than ``MIN_CLUSTER_SIZE`` are dropped unless that would
+    leave none.
+    """
+    if not documents:
+        return []
+    matrix, vocabulary = tfidf_matrix(documents)
+    if not vocabulary:
+        return [{'members': list(range(len(documents))), 'terms': []}]
+
+    labels, centroids = spherical_kmeans(matrix, k or choose_k(len(documents)))
+    similarity = matrix @ centroids.T
+
+    clusters = []
+    for c in range(len(centroids)):
+        members = np.flatnonzero(labels == c)
+        if len(members) == 0:
+            continue
+        members = members[np.argsort(-similarity[members, c], kind='stable')]
+        terms = [vocabulary[i] for i in np.argsort(-centroids[c], kind='stable')[:top_terms] if centroids[c][i] > 0]
+        clusters.append({'members': members.tolist(), 'terms': terms})
+
+    clusters.sort(key=lambda cluster: len(cluster['members']), reverse=True)
+    large = [cluster for cluster in clusters if len(cluster['members']) >= MIN_CLUSTER_SIZE]
+    return large or clusters
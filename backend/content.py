@@ -0,0 +1,62 @@
+import html
+import re
+import zlib
+
+# Article bodies live in article_content, one row per article, so the
+# articles rows every listing reads stay small. Full-text search covers the
+# year of history the site lists (the 1y timeframe). Only bodies of articles
+# older than that are zlib-compressed, since the index can't read compressed
+# bodies and then covers just their title and summary (see the
+# article_documents view).
+SEARCH_HORIZON_DAYS = 365
+COMPRESS_AFTER_DAYS = SEARCH_HORIZON_DAYS
+COMPRESS_MIN_CHARS = 256               # shorter bodies barely shrink
+COMPRESS_LEVEL = 9
+
+_SCRIPT_RE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.S | re.I)
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+def plain_text(markup):
+    """Feed HTML reduced to its text: tags dropped, entities decoded, whitespace collapsed.
+
+    Bodies are stored this way so image paths, class names and other markup
+    never turn into search terms.
+    """
+    if not markup:
+        return markup
+    text = _TAG_RE.sub(' ', _SCRIPT_RE.sub(' ', markup))
+    return _SPACE_RE.sub(' ', html.unescape(text)).strip()
+
+def pack(text):
+    return zlib.compress(text.encode('utf-8'), COMPRESS_LEVEL)
+
+def unpack(body, compressed):
+    """Return the stored *body* as text, inflating it if *compressed*."""
+    if body is None or not compressed:
+        return body
+    return zlib.decompress(body).decode('utf-8')
+
+def store_content(c, rows):
+    """Save ``(article_id, markup)`` bodies as uncompressed plain text; empty bodies are skipped."""
+    texts = [(article_id, plain_text(markup)) for article_id, markup in rows]
+    c.executemany('''INSERT INTO article_content (article_id, body, compressed) VALUES (?, ?, 0)
+                     ON CONFLICT(article_id) DO UPDATE SET body = excluded.body, compressed = 0''',
+                  [(article_id, text) for article_id, text in texts if text])
+
+def load_content(c, article_id):
+    """Body text of one article, or None."""
+    row = c.execute("SELECT body, compressed FROM article_content WHERE article_id = ?",
+                    (article_id,)).fetchone()
+    return unpack(*row) if row else None
+
+def compress_cold_content(c, days=COMPRESS_AFTER_DAYS):
+    """Compress bodies of articles published more than *days* ago. Returns how many."""
+    rows = c.execute('''SELECT b.article_id, b.body FROM article_content b
+                        JOIN articles a ON a.id = b.article_id
+                        WHERE b.compressed = 0 AND length(b.body) >= ?
+                          AND a.published_at < datetime('now', ?)''',
+                     (COMPRESS_MIN_CHARS, f'-{days} days')).fetchall()
+    c.executemany("UPDATE article_content SET body = ?, compressed = 1 WHERE article_id = ?",
+                  [(pack(body), article_id) for article_id, body in rows])
+    return len(rows)
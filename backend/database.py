@@ -1,15 +1,89 @@
 import sqlite3
 import os
+import atexit
+import threading
 from datetime import datetime
+from backend.migrations import migrate
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data.db')
 
+# Connection tuning applied to every connection handed out by this module.
+# The WAL journal mode itself is persistent and only set by init_db (the
+# writers' path), so read-only users such as the API never rewrite the file
+# header or leave -wal/-shm files next to a checked-out data.db.
+# synchronous=NORMAL is durable across application crashes in WAL mode.
+BUSY_TIMEOUT = 5                       # seconds to wait on a locked database
+CACHE_SIZE_KIB = 16 * 1024             # page cache per connection
+MMAP_SIZE = 256 * 1024 * 1024
+
+def connect(db_path=DB_PATH):
+    """Open a new connection with the tuned pragmas (journal mode left as the file has it)."""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KIB}')
+    conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+# Per-thread pool of long-lived connections, keyed by absolute DB path
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pooled = []
+_pool_generation = 0
+
+def _inode(path):
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+def get_connection(db_path=DB_PATH):
+    """Return this thread's pooled connection to *db_path* (rows as ``sqlite3.Row``).
+
+    Connections are reused across calls and must not be closed by callers.
+    A connection is replaced if the file on disk was swapped out under it
+    (e.g. a fresh checkout of ``data.db``).
+    """
+    key = os.path.abspath(db_path)
+    if getattr(_local, 'generation', None) != _pool_generation:
+        _local.connections = {}
+        _local.generation = _pool_generation
+    entry = _local.connections.get(key)
+    if entry is not None:
+        conn, inode = entry
+        if inode is not None and inode == _inode(key):
+            return conn
+        conn.close()
+
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    _local.connections[key] = (conn, _inode(key))
+    with _pool_lock:
+        _pooled.append(conn)
+    return conn
+
+@atexit.register
+def close_all():
+    """Close every pooled connection (all threads)."""
+    global _pool_generation
+    with _pool_lock:
+        _pool_generation += 1
+        connections = _pooled[:]
+        _pooled.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
 def init_db(db_path=DB_PATH):
     """Initialize the database with necessary tables."""
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
+    # WAL lets the API keep reading while the scraper or summarizer writes
+    conn.execute('PRAGMA journal_mode=WAL')
     c = conn.cursor()
     
-    # Articles table
+    # Articles table (bodies move to article_content in migration 1)
     c.execute('''CREATE TABLE IF NOT EXISTS articles
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
                   url TEXT UNIQUE NOT NULL,
@@ -29,15 +103,113 @@ def init_db(db_path=DB_PATH):
                   article_count INTEGER,
                   generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
     
+    # HTTP validator cache: one row per scraped source, used for conditional GETs
+    c.execute('''CREATE TABLE IF NOT EXISTS http_cache
+                 (source TEXT PRIMARY KEY,
+                  url TEXT NOT NULL,
+                  etag TEXT,
+                  last_modified TEXT,
+                  content_hash TEXT,
+                  checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    # Adaptive polling state: when each source is next due and how it has been doing
+    c.execute('''CREATE TABLE IF NOT EXISTS source_schedule
+                 (source TEXT PRIMARY KEY,
+                  next_due_at TIMESTAMP NOT NULL,
+                  interval_seconds INTEGER NOT NULL,
+                  consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                  last_success_at TIMESTAMP,
+                  last_error TEXT)''')
+    
+    # LLM summary cache keyed on a normalized hash of (model, prompt, title, content)
+    c.execute('''CREATE TABLE IF NOT EXISTS summary_cache
+                 (key TEXT PRIMARY KEY,
+                  summary TEXT NOT NULL,
+                  size INTEGER NOT NULL,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    # Article IDs each stored summary was built from, for incremental updates
+    c.execute('''CREATE TABLE IF NOT EXISTS summary_coverage
+                 (timeframe TEXT PRIMARY KEY,
+                  article_ids TEXT NOT NULL,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    # Map step results of trend map-reduce, reused while a bucket's articles are unchanged
+    c.execute('''CREATE TABLE IF NOT EXISTS trend_buckets
+                 (bucket TEXT NOT NULL,
+                  model TEXT NOT NULL,
+                  article_hash TEXT NOT NULL,
+                  summary_text TEXT NOT NULL,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  PRIMARY KEY (bucket, model))''')
+    
+    # Near-duplicate index: 64-bit SimHash of title+content split into six LSH bands
+    c.execute('''CREATE TABLE IF NOT EXISTS article_fingerprints
+                 (article_id INTEGER PRIMARY KEY,
+                  simhash INTEGER,
+                  band0 INTEGER,
+                  band1 INTEGER,
+                  band2 INTEGER,
+                  band3 INTEGER,
+                  band4 INTEGER,
+                  band5 INTEGER)''')
+    
+    # URLs recognised as near-duplicates, pointing at the article kept instead
+    c.execute('''CREATE TABLE IF NOT EXISTS article_aliases
+                 (url TEXT PRIMARY KEY,
+                  canonical_id INTEGER NOT NULL,
+                  source_name TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    # Small key/value store; 'generation' is bumped whenever articles or
+    # summaries change so readers can tell whether cached responses are stale
+    c.execute('''CREATE TABLE IF NOT EXISTS meta
+                 (key TEXT PRIMARY KEY,
+                  value INTEGER)''')
+    
     # Indexes for performance
-    c.execute('CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published_at)')
+    # Listing index: (published_at, id) is the order the API pages, the trend
+    # window and the static export read in, so those queries walk it instead
+    # of sorting. Supersedes the old idx_articles_published.
+    c.execute('CREATE INDEX IF NOT EXISTS idx_articles_listing ON articles(published_at, id)')
+    c.execute('DROP INDEX IF EXISTS idx_articles_published')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_articles_source_published ON articles(source_name, published_at)')
+    # Summarization queue: only unsummarized rows, already in queue order
+    # (must match UNSUMMARIZED_QUERY in backend.summarizer)
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_articles_unsummarized
+                 ON articles(CASE WHEN source_name = 'Anthropic' THEN 1 ELSE 2 END, published_at DESC)
+                 WHERE summary IS NULL OR summary = ''""")
+    c.execute('CREATE INDEX IF NOT EXISTS idx_summary_cache_lru ON summary_cache(last_used_at)')
+    for band in range(6):
+        c.execute(f'CREATE INDEX IF NOT EXISTS idx_fingerprints_band{band} ON article_fingerprints(band{band})')
     c.execute('CREATE INDEX IF NOT EXISTS idx_summaries_timeframe ON summaries(timeframe, generated_at)')
     
     conn.commit()
+    # Everything past this baseline (content split, full-text index) is a
+    # numbered step in backend.migrations
+    migrate(conn)
     conn.close()
 
+def bump_generation(c):
+    """Mark the data as changed; call inside the writing transaction."""
+    c.execute('''INSERT INTO meta (key, value) VALUES ('generation', 1)
+                 ON CONFLICT(key) DO UPDATE SET value = value + 1''')
+
+def read_generation(c):
+    """Current data generation (0 for a DB that was never written through a bumping writer)."""
+    try:
+        row = c.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+    except sqlite3.OperationalError:
+        return 0  # database predates the meta table
+    return row[0] if row else 0
+
+def checkpoint(conn):
+    """Fold the WAL back into the main file, so the file alone is complete (e.g. before committing it)."""
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
 def get_db_connection(db_path=DB_PATH):
-    """Get a connection to the database."""
-    conn = sqlite3.connect(db_path)
+    """Get a new (unpooled) connection to the database; the caller closes it."""
+    conn = connect(db_path)
     conn.row_factory = sqlite3.Row
     return conn
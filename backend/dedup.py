@@ -0,0 +1,82 @@
+import hashlib
+import re
+from backend.content import unpack
+
+SIMHASH_BITS = 64
+BANDS = 6                    # 64-bit hash split into six 10/11-bit LSH bands
+MAX_HAMMING = 5              # < BANDS, so any near-duplicate shares at least one band
+SHINGLE_SIZE = 3
+MIN_TOKENS = 8               # shorter texts are too ambiguous to fingerprint
+FINGERPRINT_CHARS = 2000
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_TOKEN_RE = re.compile(r'\w+')
+
+def fingerprint_tokens(title, content):
+    text = _TAG_RE.sub(' ', f"{title or ''} {(content or '')[:FINGERPRINT_CHARS]}")
+    return _TOKEN_RE.findall(text.lower())
+
+def simhash(tokens):
+    """64-bit SimHash over word shingles of *tokens*, or None if too short."""
+    if len(tokens) < MIN_TOKENS:
+        return None
+    weights = [0] * SIMHASH_BITS
+    shingles = {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+# Bit offsets of each band: 11, 11, 11, 11, 10, 10 bits
+_BAND_EDGES = [SIMHASH_BITS * i // BANDS for i in range(BANDS + 1)]
+
+def bands(value):
+    return [(value >> lo) & ((1 << (hi - lo)) - 1) for lo, hi in zip(_BAND_EDGES, _BAND_EDGES[1:])]
+
+def to_signed(value):
+    """SQLite INTEGER is signed 64-bit."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+def find_near_duplicate(c, value):
+    """Return the id of a stored article within ``MAX_HAMMING`` bits of *value*."""
+    where = ' OR '.join(f'band{i} = ?' for i in range(BANDS))
+    c.execute(f"SELECT article_id, simhash FROM article_fingerprints WHERE {where}", bands(value))
+    best = None
+    for article_id, stored in c.fetchall():
+        distance = hamming(value, to_unsigned(stored))
+        if distance <= MAX_HAMMING and (best is None or distance < best[0]):
+            best = (distance, article_id)
+    return best[1] if best else None
+
+def store_fingerprints(c, entries):
+    """Index ``(article_id, simhash)`` *entries*.
+
+    A None simhash is stored too, marking the article as seen but too short
+    to fingerprint.
+    """
+    columns = ', '.join(f'band{i}' for i in range(BANDS))
+    placeholders = ', '.join('?' * (BANDS + 2))
+    c.executemany(f"INSERT OR REPLACE INTO article_fingerprints (article_id, simhash, {columns}) "
+                  f"VALUES ({placeholders})",
+                  [(article_id, None, *[None] * BANDS) if value is None
+                   else (article_id, to_signed(value), *bands(value))
+                   for article_id, value in entries])
+
+def index_missing_fingerprints(conn):
+    """Fingerprint stored articles that predate the index. Returns how many were added."""
+    rows = conn.execute('''SELECT a.id, a.title, b.body, b.compressed FROM articles a
+                           LEFT JOIN article_content b ON b.article_id = a.id
+                           LEFT JOIN article_fingerprints f ON f.article_id = a.id
+                           WHERE f.article_id IS NULL''').fetchall()
+    entries = [(article_id, simhash(fingerprint_tokens(title, unpack(body, compressed))))
+               for article_id, title, body, compressed in rows]
+    with conn:
+        store_fingerprints(conn.cursor(), entries)
+    return len(entries)
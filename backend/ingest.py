@@ -0,0 +1,108 @@
+import logging
+from backend import dedup
+from backend.content import store_content
+from backend.database import bump_generation
+from backend.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Article rows handed to the ingestion layer, in insert order
+ARTICLE_COLUMNS = ('url', 'title', 'content', 'published_at', 'source_type', 'source_name')
+
+# Stay well below SQLite's bound-parameter limit for the IN (...) lookups
+LOOKUP_CHUNK_SIZE = 500
+
+def _chunked_lookup(c, query, values):
+    values = list(values)
+    for i in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[i:i + LOOKUP_CHUNK_SIZE]
+        placeholders = ','.join('?' * len(chunk))
+        c.execute(query.format(placeholders=placeholders), chunk)
+        yield from c.fetchall()
+
+def existing_urls(c, urls):
+    """Return the subset of *urls* already stored in ``articles`` or known as
+    near-duplicate aliases."""
+    urls = list(urls)
+    found = {row[0] for row in _chunked_lookup(c, "SELECT url FROM articles WHERE url IN ({placeholders})", urls)}
+    found.update(row[0] for row in _chunked_lookup(
+        c, "SELECT url FROM article_aliases WHERE url IN ({placeholders})", urls))
+    return found
+
+def ingest_articles(conn, rows):
+    """Store candidate article *rows* in a single transaction.
+
+    Each row is a tuple ordered like ``ARTICLE_COLUMNS``; its URL is
+    canonicalized first (see ``backend.urls``). Rows repeating a URL within
+    the batch or already present in the DB are dropped up front with one
+    set-based lookup. Rows whose title+content SimHash is within
+    ``dedup.MAX_HAMMING`` bits of a stored (or earlier in-batch) article are
+    recorded in ``article_aliases`` pointing at that article instead of getting
+    a row of their own. The rest are written with ``executemany``, their
+    bodies going to ``article_content``.
+    Returns ``(new_count, duplicate_count)``.
+    """
+    unique = {}
+    for row in rows:
+        url = canonicalize_url(row[0])
+        unique.setdefault(url, (url, *row[1:]))
+
+    with conn:
+        c = conn.cursor()
+        known = existing_urls(c, unique)
+        fresh = [row for url, row in unique.items() if url not in known]
+
+        # Near-duplicate check against the index and within this batch
+        accepted = []
+        fingerprints = {}
+        aliases = []
+        batch_bands = {}
+        for row in fresh:
+            value = dedup.simhash(dedup.fingerprint_tokens(row[1], row[2]))
+            canonical = None
+            if value is not None:
+                canonical = dedup.find_near_duplicate(c, value)
+                if canonical is None:
+                    for band, key in enumerate(dedup.bands(value)):
+                        for other_url, other_value in batch_bands.get((band, key), []):
+                            if dedup.hamming(value, other_value) <= dedup.MAX_HAMMING:
+                                canonical = other_url
+                                break
+                        if canonical is not None:
+                            break
+            if canonical is not None:
+                aliases.append((row[0], canonical, row[5]))
+                continue
+            accepted.append(row)
+            fingerprints[row[0]] = value
+            if value is not None:
+                for band, key in enumerate(dedup.bands(value)):
+                    batch_bands.setdefault((band, key), []).append((row[0], value))
+
+        new_count = 0
+        if accepted:
+            # OR IGNORE still guards against a concurrent writer racing us
+            c.executemany('''INSERT OR IGNORE INTO articles
+                             (url, title, published_at, source_type, source_name)
+                             VALUES (?, ?, ?, ?, ?)''', [(row[0], row[1], *row[3:]) for row in accepted])
+            new_count = c.rowcount
+            ids = dict(_chunked_lookup(c, "SELECT url, id FROM articles WHERE url IN ({placeholders})",
+                                       fingerprints))
+            store_content(c, [(ids[row[0]], row[2]) for row in accepted if row[0] in ids])
+            dedup.store_fingerprints(c, [(ids[url], value) for url, value in fingerprints.items() if url in ids])
+
+        if aliases:
+            # In-batch matches point at a URL; resolve them to the stored id
+            url_targets = [target for _, target, _ in aliases if isinstance(target, str)]
+            ids = dict(_chunked_lookup(c, "SELECT url, id FROM articles WHERE url IN ({placeholders})",
+                                       url_targets)) if url_targets else {}
+            alias_rows = [(url, ids.get(target) if isinstance(target, str) else target, source)
+                          for url, target, source in aliases]
+            c.executemany('''INSERT OR IGNORE INTO article_aliases (url, canonical_id, source_name)
+                             VALUES (?, ?, ?)''', [row for row in alias_rows if row[1] is not None])
+            logger.info(f"{len(aliases)} near-duplicate articles recorded as aliases.")
+
+        if new_count:
+            bump_generation(c)
+
+    return new_count, len(rows) - new_count
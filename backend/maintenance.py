@@ -0,0 +1,133 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+from itertools import groupby
+from backend.content import SEARCH_HORIZON_DAYS, compress_cold_content, unpack
+from backend.database import DB_PATH, init_db, connect, checkpoint, bump_generation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Articles published before the horizon keep their row (title, url, summary
+# still power listings, the 1y view and the static export) but their body
+# moves to a monthly archive file, ARCHIVE_DIR/YYYY-MM.jsonl.gz. By default
+# that is every body past the search horizon.
+RETENTION_DAYS = SEARCH_HORIZON_DAYS
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), 'archive')
+SUMMARIES_KEPT = 3                     # newest summaries rows kept per timeframe
+
+ARCHIVE_QUERY = '''
+    SELECT a.id, a.url, a.title, a.published_at, a.source_type, a.source_name, a.summary,
+           b.body, b.compressed
+    FROM article_content b JOIN articles a ON a.id = b.article_id
+    WHERE a.published_at < datetime('now', ?)
+    ORDER BY a.published_at, a.id
+'''
+
+def db_size(db_path):
+    """Bytes on disk for *db_path* including its WAL file."""
+    return sum(os.path.getsize(path) for path in (db_path, db_path + '-wal') if os.path.exists(path))
+
+def _read_archive(path):
+    if not os.path.exists(path):
+        return {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return {record['id']: record for record in map(json.loads, f)}
+
+def write_archive(archive_dir, month, records):
+    """Merge *records* into ``<month>.jsonl.gz``, replacing the file atomically."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{month}.jsonl.gz')
+    merged = _read_archive(path)
+    merged.update((record['id'], record) for record in records)
+    tmp_path = path + '.tmp'
+    # mtime=0 keeps the bytes stable so an unchanged month doesn't show up in git
+    with open(tmp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+        for article_id in sorted(merged):
+            f.write(json.dumps(merged[article_id], ensure_ascii=False).encode('utf-8') + b'\n')
+    os.replace(tmp_path, path)
+    return path
+
+def archive_old_content(conn, archive_dir=ARCHIVE_DIR, days=RETENTION_DAYS):
+    """Copy bodies of articles older than *days* to monthly archives, then drop them.
+
+    Archives are written before anything is deleted, so an interrupted run
+    only repeats work. *archive_dir* is created even when nothing is old
+    enough yet, so callers can always stage it. Returns
+    ``{month: article_count}``.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    rows = conn.execute(ARCHIVE_QUERY, (f'-{days} days',)).fetchall()
+    archived = {}
+    for month, group in groupby(rows, key=lambda row: row[3][:7]):
+        records = [{'id': row[0], 'url': row[1], 'title': row[2], 'published_at': row[3],
+                    'source_type': row[4], 'source_name': row[5], 'summary': row[6],
+                    'content': unpack(row[7], row[8])} for row in group]
+        write_archive(archive_dir, month, records)
+        archived[month] = len(records)
+
+    if rows:
+        with conn:
+            conn.executemany("DELETE FROM article_content WHERE article_id = ?", [(row[0],) for row in rows])
+            bump_generation(conn)
+    return archived
+
+def prune_summaries(conn, keep=SUMMARIES_KEPT):
+    """Delete all but the newest *keep* summaries per timeframe. Returns how many went."""
+    with conn:
+        cursor = conn.execute('''DELETE FROM summaries WHERE id IN (
+                                     SELECT id FROM (
+                                         SELECT id, ROW_NUMBER() OVER (
+                                             PARTITION BY timeframe ORDER BY generated_at DESC, id DESC) AS n
+                                         FROM summaries)
+                                     WHERE n > ?)''', (keep,))
+    return cursor.rowcount
+
+def compact(conn):
+    """VACUUM, refresh planner statistics and fold the WAL back into the file."""
+    conn.execute('VACUUM')
+    conn.execute('ANALYZE')
+    conn.execute('PRAGMA optimize')
+    checkpoint(conn)
+
+def run_maintenance(db_path=DB_PATH, archive_dir=ARCHIVE_DIR, days=RETENTION_DAYS, keep_summaries=SUMMARIES_KEPT):
+    """Archive, prune and compact *db_path*. Returns a report dict."""
+    init_db(db_path)
+    before = db_size(db_path)
+    conn = connect(db_path)
+    try:
+        archived = archive_old_content(conn, archive_dir, days)
+        with conn:
+            compressed = compress_cold_content(conn)
+        pruned = prune_summaries(conn, keep_summaries)
+        compact(conn)
+    finally:
+        conn.close()
+    after = db_size(db_path)
+
+    report = {
+        'archived': sum(archived.values()),
+        'archive_months': sorted(archived),
+        'compressed': compressed,
+        'summaries_pruned': pruned,
+        'bytes_before': before,
+        'bytes_after': after,
+        'bytes_reclaimed': before - after,
+    }
+    logger.info(f"Archived {report['archived']} article bodies into {len(archived)} monthly files, "
+                f"compressed {compressed}, pruned {pruned} summaries. "
+                f"{before / 1024:.0f} KiB -> {after / 1024:.0f} KiB ({report['bytes_reclaimed'] / 1024:.0f} KiB reclaimed).")
+    return report
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Archive old article bodies and compact the database")
+    arg_parser.add_argument('--db', default=DB_PATH)
+    arg_parser.add_argument('--days', type=int, default=RETENTION_DAYS,
+                            help="archive bodies of articles older than this many days")
+    arg_parser.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    arg_parser.add_argument('--keep-summaries', type=int, default=SUMMARIES_KEPT,
+                            help="summaries rows kept per timeframe")
+    args = arg_parser.parse_args()
+    run_maintenance(args.db, args.archive_dir, args.days, args.keep_summaries)
@@ -0,0 +1,212 @@
+import json
+import logging
+from backend import content
+from backend.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Schema changes past the init_db baseline, applied in order and tracked in
+# PRAGMA user_version. Append new steps; never edit or reorder applied ones.
+
+# Body text the search index sees for an article_content row: compressed
+# (cold) bodies are left out of the index
+_SEARCHABLE = "CASE WHEN {row}.compressed THEN NULL ELSE {row}.body END"
+_BODY_OF = f"(SELECT {_SEARCHABLE.format(row='b')} FROM article_content b WHERE b.article_id = {{id}})"
+
+def _columns(c, table):
+    return {row[1] for row in c.execute(f'PRAGMA table_info({table})')}
+
+def split_article_content(c):
+    """Move article bodies into article_content and drop articles.content.
+
+    The FTS table switches its external content to the article_documents
+    view; triggers on both tables keep it in sync.
+    """
+    c.execute('''CREATE TABLE IF NOT EXISTS article_content
+                 (article_id INTEGER PRIMARY KEY,
+                  body BLOB,
+                  compressed INTEGER NOT NULL DEFAULT 0)''')
+
+    # The old search index and its triggers read articles.content directly
+    for trigger in ('articles_fts_insert', 'articles_fts_delete', 'articles_fts_update'):
+        c.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    c.execute('DROP TABLE IF EXISTS articles_fts')
+    if 'content' in _columns(c, 'articles'):
+        c.execute('''INSERT INTO article_content (article_id, body)
+                     SELECT id, content FROM articles WHERE content IS NOT NULL AND content != '' ''')
+        c.execute('ALTER TABLE articles DROP COLUMN content')
+
+    c.execute(f'''CREATE VIEW article_documents AS
+                  SELECT a.id AS id, a.title AS title, {_SEARCHABLE.format(row='b')} AS content, a.summary AS summary
+                  FROM articles a LEFT JOIN article_content b ON b.article_id = a.id''')
+    c.execute('''CREATE VIRTUAL TABLE articles_fts USING fts5
+                 (title, content, summary,
+                  content='article_documents', content_rowid='id', tokenize='porter unicode61')''')
+
+    c.execute(f'''CREATE TRIGGER articles_fts_insert AFTER INSERT ON articles BEGIN
+                      INSERT INTO articles_fts (rowid, title, content, summary)
+                      VALUES (new.id, new.title, {_BODY_OF.format(id='new.id')}, new.summary);
+                  END''')
+    c.execute(f'''CREATE TRIGGER articles_fts_delete AFTER DELETE ON articles BEGIN
+                      INSERT INTO articles_fts (articles_fts, rowid, title, content, summary)
+                      VALUES ('delete', old.id, old.title, {_BODY_OF.format(id='old.id')}, old.summary);
+                      DELETE FROM article_content WHERE article_id = old.id;
+                  END''')
+    c.execute(f'''CREATE TRIGGER articles_fts_update AFTER UPDATE OF title, summary ON articles BEGIN
+                      INSERT INTO articles_fts (articles_fts, rowid, title, content, summary)
+                      VALUES ('delete', old.id, old.title, {_BODY_OF.format(id='old.id')}, old.summary);
+                      INSERT INTO articles_fts (rowid, title, content, summary)
+                      VALUES (new.id, new.title, {_BODY_OF.format(id='new.id')}, new.summary);
+                  END''')
+
+    # Body changes re-index the owning article; after the article itself is
+    # deleted these find no row and do nothing
+    c.execute(f'''CREATE TRIGGER article_content_insert AFTER INSERT ON article_content BEGIN
+                      INSERT INTO articles_fts (articles_fts, rowid, title, content, summary)
+                      SELECT 'delete', id, title, NULL, summary FROM articles WHERE id = new.article_id;
+                      INSERT INTO articles_fts (rowid, title, content, summary)
+                      SELECT id, title, {_SEARCHABLE.format(row='new')}, summary FROM articles WHERE id = new.article_id;
+                  END''')
+    c.execute(f'''CREATE TRIGGER article_content_update AFTER UPDATE ON article_content BEGIN
+                      INSERT INTO articles_fts (articles_fts, rowid, title, content, summary)
+                      SELECT 'delete', id, title, {_SEARCHABLE.format(row='old')}, summary FROM articles WHERE id = old.article_id;
+                      INSERT INTO articles_fts (rowid, title, content, summary)
+                      SELECT id, title, {_SEARCHABLE.format(row='new')}, summary FROM articles WHERE id = new.article_id;
+                  END''')
+    c.execute(f'''CREATE TRIGGER article_content_delete AFTER DELETE ON article_content BEGIN
+                      INSERT INTO articles_fts (articles_fts, rowid, title, content, summary)
+                      SELECT 'delete', id, title, {_SEARCHABLE.format(row='old')}, summary FROM articles WHERE id = old.article_id;
+                      INSERT INTO articles_fts (rowid, title, content, summary)
+                      SELECT id, title, NULL, summary FROM articles WHERE id = old.article_id;
+                  END''')
+
+    c.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+    compressed = content.compress_cold_content(c)
+    logger.info(f"Moved article bodies to article_content ({compressed} cold bodies compressed).")
+
+def strip_article_markup(c):
+    """Reduce stored bodies to plain text; the update trigger re-indexes each one."""
+    rows = c.execute("SELECT article_id, body, compressed FROM article_content").fetchall()
+    updates, empty = [], []
+    for article_id, body, compressed in rows:
+        original = content.unpack(body, compressed)
+        text = content.plain_text(original)
+        if not text:
+            empty.append((article_id,))
+        elif text != original:
+            updates.append((content.pack(text) if compressed else text, article_id))
+    c.executemany("UPDATE article_content SET body = ? WHERE article_id = ?", updates)
+    c.executemany("DELETE FROM article_content WHERE article_id = ?", empty)
+    logger.info(f"Stripped markup from {len(updates)} article bodies.")
+
+def _remap_ids(ids, remap):
+    out = []
+    for i in ids:
+        i = remap.get(i, i)
+        if i not in out:
+            out.append(i)
+    return out
+
+def _remap_summaries(c, remap):
+    """Point trend article_ids and coverage sets at the surviving articles."""
+    for summary_id, text in c.execute("SELECT id, summary_text FROM summaries").fetchall():
+        try:
+            data = json.loads(text)
+        except (TypeError, ValueError):
+            continue  # short timeframes store plain text
+        if not isinstance(data, dict) or 'trends' not in data:
+            continue
+        for trend in data['trends']:
+            trend['article_ids'] = _remap_ids(trend.get('article_ids', []), remap)
+        c.execute("UPDATE summaries SET summary_text = ? WHERE id = ?", (json.dumps(data), summary_id))
+
+    for timeframe, ids in c.execute("SELECT timeframe, article_ids FROM summary_coverage").fetchall():
+        c.execute("UPDATE summary_coverage SET article_ids = ? WHERE timeframe = ?",
+                  (json.dumps(_remap_ids(json.loads(ids), remap)), timeframe))
+
+def merge_url_variants(c):
+    """Collapse articles whose URLs only differ cosmetically (see backend.urls).
+
+    Rows stored before URLs were canonicalized on ingest are merged per
+    canonical URL into one keeper: the row with a summary, else the oldest.
+    The other URLs become article_aliases so later scrapes still recognise
+    them, and stored trends and coverage sets follow the surviving IDs.
+    """
+    groups = {}
+    for row in c.execute("SELECT id, url, summary, source_name FROM articles ORDER BY id").fetchall():
+        groups.setdefault(canonicalize_url(row[1]), []).append(row)
+
+    remap = {}
+    rewritten = 0
+    for canonical, rows in groups.items():
+        if len(rows) == 1 and rows[0][1] == canonical:
+            continue
+        rewritten += 1
+        keeper = min(rows, key=lambda r: (not r[2], r[0]))
+        others = [r for r in rows if r[0] != keeper[0]]
+        if others:
+            ids = [r[0] for r in others]
+            placeholders = ','.join('?' * len(ids))
+            c.execute(f"DELETE FROM article_fingerprints WHERE article_id IN ({placeholders})", ids)
+            c.execute(f"DELETE FROM articles WHERE id IN ({placeholders})", ids)
+            c.execute(f"UPDATE article_aliases SET canonical_id = ? WHERE canonical_id IN ({placeholders})",
+                      [keeper[0], *ids])
+            c.executemany('''INSERT OR IGNORE INTO article_aliases (url, canonical_id, source_name)
+                             VALUES (?, ?, ?)''',
+                          [(r[1], keeper[0], r[3]) for r in others if r[1] != canonical])
+            if not keeper[2]:
+                summary = next((r[2] for r in others if r[2]), None)
+                if summary:
+                    c.execute("UPDATE articles SET summary = ? WHERE id = ?", (summary, keeper[0]))
+            remap.update((i, keeper[0]) for i in ids)
+
+        if keeper[1] != canonical:
+            c.execute("UPDATE articles SET url = ? WHERE id = ?", (canonical, keeper[0]))
+            c.execute("INSERT OR IGNORE INTO article_aliases (url, canonical_id, source_name) VALUES (?, ?, ?)",
+                      (keeper[1], keeper[0], keeper[3]))
+
+    if remap:
+        _remap_summaries(c, remap)
+    logger.info(f"Canonicalized {rewritten} article URLs, merging away {len(remap)} duplicates.")
+
+# (version, step, VACUUM afterwards to hand freed pages back)
+MIGRATIONS = [
+    (1, split_article_content, True),
+    (2, strip_article_markup, True),
+    (3, merge_url_variants, False),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(conn):
+    """Apply pending migrations, each in its own transaction. Returns the versions applied.
+
+    Each step also bumps the data generation, since it may change what
+    the API serves.
+    """
+    from backend.database import bump_generation
+    applied = []
+    vacuum = False
+    for version, step, reclaim in MIGRATIONS:
+        # IMMEDIATE takes the write lock before re-checking, so two processes
+        # starting at once can't both run a step
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            step(conn.cursor())
+            bump_generation(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(f"Applied schema migration {version} ({step.__name__}).")
+        applied.append(version)
+        vacuum = vacuum or reclaim
+    if vacuum:
+        conn.execute('VACUUM')
+    return applied
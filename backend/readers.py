@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend.database import get_connection
+
+# Read queries for the async API run on a dedicated pool of reader threads,
+# each keeping its own pooled WAL connection, so the event loop never blocks
+# on SQLite. READER_THREADS bounds how many queries run at once, MAX_PENDING
+# how many may be queued or running before requests are turned away, and a
+# query still running after QUERY_TIMEOUT seconds is interrupted.
+READER_THREADS = 8
+MAX_PENDING = 256
+QUERY_TIMEOUT = 5.0
+
+class Overloaded(Exception):
+    """Too many queries are already queued or running."""
+
+class ReaderPool:
+    def __init__(self, threads=READER_THREADS, max_pending=MAX_PENDING, timeout=QUERY_TIMEOUT):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix='db-reader')
+            return self._executor
+
+    async def run(self, db_path, func, *args):
+        """Run ``func(conn, *args)`` on a reader thread and return its result.
+
+        Raises ``Overloaded`` when ``max_pending`` queries are already in
+        flight and ``TimeoutError`` when the call takes longer than
+        ``timeout``; a query still running at that point is interrupted so
+        its thread is freed.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise Overloaded()
+            self._pending += 1
+        running = {}
+
+        def job():
+            conn = get_connection(db_path)
+            with self._lock:
+                running['conn'] = conn
+            try:
+                return func(conn, *args)
+            finally:
+                with self._lock:
+                    running.pop('conn', None)
+
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._get_executor(), job)
+            return await asyncio.wait_for(future, self.timeout)
+        except TimeoutError:
+            # A job that hadn't started was cancelled by wait_for
+            with self._lock:
+                conn = running.pop('conn', None)
+                if conn is not None:
+                    conn.interrupt()
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,160 @@
+import argparse
+import datetime
+import logging
+import statistics
+import time
+from dateutil import parser as date_parser
+from backend.database import DB_PATH, init_db, connect
+from backend.scraper import scrape_sources
+from backend.sources import load_sources
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = 15 * 60            # never poll a source more often than this
+MAX_INTERVAL = 24 * 60 * 60       # quiet sources are still checked daily
+MAX_BACKOFF = 3 * 24 * 60 * 60    # cap for broken sources
+POLLS_PER_PUBLISH = 4             # polls per typical gap between two posts
+HISTORY_SIZE = 20                 # recent articles used to learn the publish rate
+MIN_HISTORY = 3
+POLL_SECONDS = 60                 # longest sleep between scheduler wake-ups
+
+def learned_interval(c, source):
+    """Polling interval for *source* learned from its publish history.
+
+    Uses the median gap between its last ``HISTORY_SIZE`` articles, divided by
+    ``POLLS_PER_PUBLISH`` and clamped to ``[MIN_INTERVAL, MAX_INTERVAL]``.
+    Sources without enough history keep their configured ``fetch_interval``.
+    """
+    c.execute('''SELECT published_at FROM articles
+                 WHERE source_name = ?
+                 ORDER BY published_at DESC
+                 LIMIT ?''', (source.name, HISTORY_SIZE))
+    stamps = []
+    for (value,) in c.fetchall():
+        try:
+            stamps.append(date_parser.parse(str(value)).replace(tzinfo=None))
+        except (ValueError, OverflowError):
+            continue
+    if len(stamps) < MIN_HISTORY:
+        return source.fetch_interval
+
+    stamps.sort()
+    gaps = [(b - a).total_seconds() for a, b in zip(stamps, stamps[1:])]
+    interval = statistics.median(gaps) / POLLS_PER_PUBLISH
+    return int(min(max(interval, MIN_INTERVAL), MAX_INTERVAL))
+
+def backoff_interval(interval, failures):
+    """Exponential backoff: double *interval* for every consecutive failure."""
+    return int(min(interval * 2 ** failures, MAX_BACKOFF))
+
+def _load_schedule(c):
+    c.execute('''SELECT source, next_due_at, interval_seconds, consecutive_failures
+                 FROM source_schedule''')
+    return {
+        row[0]: {
+            'next_due_at': date_parser.parse(str(row[1])),
+            'interval_seconds': row[2],
+            'consecutive_failures': row[3],
+        }
+        for row in c.fetchall()
+    }
+
+def due_sources(c, sources, now):
+    """Return the sources whose next poll is at or before *now*.
+
+    Sources never polled before are always due.
+    """
+    schedule = _load_schedule(c)
+    return [s for s in sources
+            if s.name not in schedule or schedule[s.name]['next_due_at'] <= now]
+
+def record_outcome(c, source, outcome, now):
+    """Persist when *source* is next due after a poll that ended in *outcome*."""
+    c.execute("SELECT consecutive_failures FROM source_schedule WHERE source = ?", (source.name,))
+    row = c.fetchone()
+    failures = row[0] if row else 0
+
+    interval = learned_interval(c, source)
+    if isinstance(outcome, Exception):
+        failures += 1
+        interval = backoff_interval(interval, failures)
+        logger.warning(f"{source.name} failed ({failures} in a row), next try in {interval}s: {outcome}")
+        c.execute('''INSERT INTO source_schedule
+                     (source, next_due_at, interval_seconds, consecutive_failures, last_error)
+                     VALUES (?, ?, ?, ?, ?)
+                     ON CONFLICT(source) DO UPDATE SET
+                         next_due_at = excluded.next_due_at,
+                         interval_seconds = excluded.interval_seconds,
+                         consecutive_failures = excluded.consecutive_failures,
+                         last_error = excluded.last_error''',
+                  (source.name, now + datetime.timedelta(seconds=interval), interval,
+                   failures, str(outcome)))
+    else:
+        logger.info(f"{source.name}: {outcome} new, next poll in {interval}s")
+        c.execute('''INSERT INTO source_schedule
+                     (source, next_due_at, interval_seconds, consecutive_failures,
+                      last_success_at, last_error)
+                     VALUES (?, ?, ?, 0, ?, NULL)
+                     ON CONFLICT(source) DO UPDATE SET
+                         next_due_at = excluded.next_due_at,
+                         interval_seconds = excluded.interval_seconds,
+                         consecutive_failures = 0,
+                         last_success_at = excluded.last_success_at,
+                         last_error = NULL''',
+                  (source.name, now + datetime.timedelta(seconds=interval), interval, now))
+
+def run_due(db_path=DB_PATH, sources=None, now=None, **scrape_kwargs):
+    """Scrape the sources that are due and reschedule them.
+
+    Returns the number of seconds until the next source becomes due.
+    """
+    if sources is None:
+        sources = load_sources()
+    now = now or datetime.datetime.now()
+
+    init_db(db_path)
+    conn = connect(db_path)
+    c = conn.cursor()
+    due = due_sources(c, sources, now)
+    conn.close()
+
+    if due:
+        logger.info(f"Polling {len(due)} due sources: {', '.join(s.name for s in due)}")
+        outcomes = scrape_sources(due, db_path=db_path, **scrape_kwargs)
+        conn = connect(db_path)
+        c = conn.cursor()
+        for source in due:
+            record_outcome(c, source, outcomes.get(source.name, 0), now)
+        conn.commit()
+        conn.close()
+
+    conn = connect(db_path)
+    c = conn.cursor()
+    names = {s.name for s in sources}
+    upcoming = [entry['next_due_at'] for name, entry in _load_schedule(c).items() if name in names]
+    conn.close()
+    if not upcoming:
+        return 0
+    return max((min(upcoming) - now).total_seconds(), 0)
+
+def run_forever(db_path=DB_PATH, poll_seconds=POLL_SECONDS, **scrape_kwargs):
+    """Long-running loop: poll due sources, then sleep until the next is due."""
+    logger.info("Scheduler started.")
+    while True:
+        try:
+            wait = run_due(db_path=db_path, **scrape_kwargs)
+        except Exception as e:
+            logger.error(f"Scheduler cycle failed: {e}")
+            wait = poll_seconds
+        time.sleep(min(max(wait, 1), poll_seconds))
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Adaptive per-source scrape scheduler")
+    arg_parser.add_argument('--once', action='store_true', help="poll due sources once and exit")
+    arg_parser.add_argument('--parse-workers', type=int, default=0)
+    args = arg_parser.parse_args()
+    if args.once:
+        run_due(parse_workers=args.parse_workers)
+    else:
+        run_forever(parse_workers=args.parse_workers)
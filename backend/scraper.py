@@ -1,21 +1,38 @@
+import asyncio
+import concurrent.futures
 import feedparser
-import sqlite3
+import hashlib
+import httpx
+import json
 import datetime
 import logging
 from dateutil import parser as date_parser
-from backend.database import DB_PATH
+from collections import namedtuple
+from backend.database import DB_PATH, init_db, connect, checkpoint
+from backend.dedup import index_missing_fingerprints
+from backend.ingest import ingest_articles
+from backend.sources import load_sources
+from backend.urls import canonicalize_url
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-COMPANY_FEEDS = {
-    'OpenAI': 'https://openai.com/blog/rss.xml',
-    'Anthropic': 'https://raw.githubusercontent.com/Olshansk/rss-feeds/main/feeds/feed_anthropic.xml',
-    'Google DeepMind': 'https://deepmind.google/blog/rss.xml',
-    'Meta AI': 'https://engineering.fb.com/feed/',
-    'NVIDIA': 'https://blogs.nvidia.com/feed/'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
+# Fetch stage tuning
+REQUEST_TIMEOUT = 10.0      # seconds per request
+PER_HOST_LIMIT = 4          # concurrent requests against a single host
+FETCH_DEADLINE = 60.0       # seconds for the whole fetch stage
+PARSE_TIMEOUT = 60.0        # seconds parse workers get once fetching is done
+
+# Outcome of a successful fetch. ``not_modified`` is True when the server
+# answered 304 to our conditional GET, in which case ``body`` is None.
+# ``rows`` holds the parsed article rows when a parse stage ran during the fetch.
+FetchResult = namedtuple('FetchResult', 'body content_hash etag last_modified not_modified rows',
+                         defaults=(None,))
+
 def is_valid_url(url: str) -> bool:
     """Return True if *url* is a non-empty absolute HTTP/HTTPS URL."""
     return bool(url) and url.startswith(('http://', 'https://'))
@@ -32,168 +49,424 @@ def parse_date(entry):
 from bs4 import BeautifulSoup
 import re
 
-def scrape_anthropic_html(c):
-    """Custom scraper for Anthropic news page using HTML parsing."""
-    url = "https://www.anthropic.com/news"
-    logger.info(f"Scraping Anthropic HTML from {url}...")
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+async def _fetch_one(client, name, url, validators, host_semaphores, per_host_limit, parse, parses):
+    """GET *url* through the shared client, holding its host's semaphore.
+
+    *validators* is the cached ``{'etag', 'last_modified'}`` for this source
+    (or None) and is sent as ``If-None-Match``/``If-Modified-Since``. When
+    *parse* is given, ``parse(name, result)`` is started as its own task in
+    *parses* once the body is in, so the fetch deadline never covers it.
+    """
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+    host = httpx.URL(url).host
+    semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(per_host_limit))
+    async with semaphore:
+        response = await client.get(url, headers=headers)
+
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if response.status_code == 304:
+        # Keep the old validators if the 304 doesn't repeat them
+        return FetchResult(None, None,
+                           etag or (validators or {}).get('etag'),
+                           last_modified or (validators or {}).get('last_modified'),
+                           True)
+    response.raise_for_status()
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    result = FetchResult(response.text, content_hash, etag, last_modified, False)
+    if parse is not None:
+        parses[name] = asyncio.create_task(parse(name, result))
+    return result
+
+async def fetch_sources(sources, validators=None, per_host_limit=PER_HOST_LIMIT,
+                        deadline=FETCH_DEADLINE, timeout=REQUEST_TIMEOUT, transport=None,
+                        parse=None, parse_timeout=PARSE_TIMEOUT):
+    """Fetch every ``{name: url}`` in *sources* concurrently.
+
+    All requests share one pooled ``httpx.AsyncClient``; at most
+    *per_host_limit* requests run against the same host at once and the whole
+    stage is abandoned after *deadline* seconds. *validators* maps source names
+    to their cached HTTP validators so unchanged sources cost a single 304.
+    *parse* is an optional coroutine run on each body as soon as it arrives,
+    so parsing overlaps with the remaining downloads; its return value is
+    attached as ``rows``. Parsing is not bound by *deadline*: once fetching
+    is over, outstanding parses get *parse_timeout* more seconds, and a parse
+    that misses it leaves ``rows`` as None for the caller to parse inline.
+    Returns ``{name: FetchResult}`` where a failed or timed-out fetch maps to
+    the exception instead.
+    """
+    validators = validators or {}
+    host_semaphores = {}
+    parses = {}
+    async with httpx.AsyncClient(headers=HEADERS, timeout=timeout,
+                                 follow_redirects=True, transport=transport) as client:
+        tasks = {
+            name: asyncio.create_task(_fetch_one(client, name, url, validators.get(name),
+                                                 host_semaphores, per_host_limit, parse, parses))
+            for name, url in sources.items()
+        }
+        if not tasks:
+            return {}
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = {}
+    for name, task in tasks.items():
+        if task in pending:
+            results[name] = asyncio.TimeoutError(f"fetch deadline of {deadline}s exceeded")
+        elif task.exception() is not None:
+            results[name] = task.exception()
+        else:
+            results[name] = task.result()
+
+    if parses:
+        _, late = await asyncio.wait(parses.values(), timeout=parse_timeout)
+        for task in late:
+            task.cancel()
+        await asyncio.gather(*late, return_exceptions=True)
+        for name, task in parses.items():
+            if task in late:
+                logger.warning(f"Parsing {name} took over {parse_timeout}s; parsing it inline instead.")
+            elif task.exception() is not None:
+                logger.warning(f"Parse stage failed for {name}: {task.exception()}")
+            else:
+                results[name] = results[name]._replace(rows=task.result())
+    return results
+
+def load_validators(c, sources):
+    """Return cached ``{name: {'etag', 'last_modified', 'content_hash'}}`` for *sources*.
+
+    Entries whose URL no longer matches the configured one are ignored.
+    """
+    c.execute("SELECT source, url, etag, last_modified, content_hash FROM http_cache")
+    return {
+        source: {'etag': etag, 'last_modified': last_modified, 'content_hash': content_hash}
+        for source, url, etag, last_modified, content_hash in c.fetchall()
+        if sources.get(source) == url
     }
+
+def save_validators(c, source, url, result, content_hash):
+    """Remember the validators and body hash of the latest fetch of *source*."""
+    c.execute('''INSERT OR REPLACE INTO http_cache
+                 (source, url, etag, last_modified, content_hash, checked_at)
+                 VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)''',
+              (source, url, result.etag, result.last_modified, content_hash))
+
+# Parser name -> callable(source, body) returning article rows.
+# Sources pick one via the "parser" key in sources.json.
+PARSERS = {}
+
+def register_parser(name):
+    """Decorator adding a parser to ``PARSERS`` under *name*."""
+    def decorator(func):
+        PARSERS[name] = func
+        return func
+    return decorator
+
+def parse_anthropic_html(html):
+    """Extract article rows from the Anthropic news page HTML."""
+    soup = BeautifulSoup(html, 'html.parser')
     
-    count = 0
-    import httpx 
+    # 1. Featured Articles (Grid Items)
+    featured_items = soup.find_all('a', class_=lambda x: x and 'gridItem' in x)
+    # 2. List Items
+    list_items = soup.find_all('a', class_=lambda x: x and 'listItem' in x)
     
-    try:
-        response = httpx.get(url, headers=headers, timeout=10.0, follow_redirects=True)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 1. Featured Articles (Grid Items)
-        featured_items = soup.find_all('a', class_=lambda x: x and 'gridItem' in x)
-        # 2. List Items
-        list_items = soup.find_all('a', class_=lambda x: x and 'listItem' in x)
-        
-        all_items = featured_items + list_items
-        
-        for item in all_items:
-            try:
-                link = item.get('href')
-                if not link: continue
-                
-                if not link.startswith('http'):
-                    if not link.startswith('/'):
-                        link = '/' + link
-                    link = f"https://www.anthropic.com{link}"
-                
-                if not is_valid_url(link):
-                    continue
+    all_items = featured_items + list_items
+    
+    rows = []
+    for item in all_items:
+        try:
+            link = item.get('href')
+            if not link: continue
+            
+            link = canonicalize_url(link, base_url='https://www.anthropic.com/')
+            
+            if not is_valid_url(link):
+                continue
 
-                # FILTER: Exclude legal/policy/careers
-                if any(x in link.lower() for x in ['/legal/', '/careers', '/company', 'policy', 'terms']):
-                    continue
+            # FILTER: Exclude legal/policy/careers
+            if any(x in link.lower() for x in ['/legal/', '/careers', '/company', 'policy', 'terms']):
+                continue
 
-                # Title Extraction
-                # Try finding specific heading tags first
-                title_tag = item.find('h3') or item.find('h4')
-                
-                if not title_tag:
-                     # List items often have class="...title..."
-                     title_span = item.find('span', class_=lambda x: x and 'title' in x.lower())
-                     if title_span:
-                         title_tag = title_span
-                     else:
-                         # Fallback: Check for generic spans, usually the last one or longest one is the title
-                         spans = item.find_all('span')
-                         if len(spans) > 0:
-                             # Often the date category is short, title is long
-                             title_tag = max(spans, key=lambda s: len(s.get_text()))
+            # Title Extraction
+            # Try finding specific heading tags first
+            title_tag = item.find('h3') or item.find('h4')
+            
+            if not title_tag:
+                 # List items often have class="...title..."
+                 title_span = item.find('span', class_=lambda x: x and 'title' in x.lower())
+                 if title_span:
+                     title_tag = title_span
+                 else:
+                     # Fallback: Check for generic spans, usually the last one or longest one is the title
+                     spans = item.find_all('span')
+                     if len(spans) > 0:
+                         # Often the date category is short, title is long
+                         title_tag = max(spans, key=lambda s: len(s.get_text()))
+            
+            if not title_tag:
+                continue # Skip if no title found
                 
-                if not title_tag:
-                    continue # Skip if no title found
-                    
-                title = title_tag.get_text().strip()
-                if not title or title.lower() == "anthropic news":
-                    continue
+            title = title_tag.get_text().strip()
+            if not title or title.lower() == "anthropic news":
+                continue
 
-                # Date Extraction
-                date_tag = item.find('time')
-                if date_tag:
-                    try:
-                        dt = date_parser.parse(date_tag.get_text())
-                    except:
-                        dt = datetime.datetime.now()
-                else:
+            # Date Extraction
+            date_tag = item.find('time')
+            if date_tag:
+                try:
+                    dt = date_parser.parse(date_tag.get_text())
+                except:
                     dt = datetime.datetime.now()
+            else:
+                dt = datetime.datetime.now()
+            
+            rows.append((link, title, '', dt, 'blog', 'Anthropic'))
                 
-                # Insert
-                c.execute('''INSERT OR IGNORE INTO articles 
-                           (url, title, content, published_at, source_type, source_name)
-                           VALUES (?, ?, ?, ?, ?, ?)''',
-                          (link, title, '', dt, 'blog', 'Anthropic'))
-                
-                if c.rowcount > 0:
-                    count += 1
-                    logger.info(f"Scraped Anthropic: {title}")
-                    
-            except Exception as e:
-                # logger.warning(f"Failed to parse inner Anthropic item: {e}")
+        except Exception as e:
+            # logger.warning(f"Failed to parse inner Anthropic item: {e}")
+            continue
+
+    return rows
+
+def parse_feed_entries(company, feed):
+    """Turn the entries of a parsed feed into article rows."""
+    rows = []
+    for entry in feed.entries:
+        try:
+            url = entry.link
+            if not is_valid_url(url):
+                logger.warning(f"Skipping entry with invalid URL from {company}: {url!r}")
                 continue
+            title = entry.title
+            # Some feeds put content in 'content' list, others in 'summary'
+            content = ''
+            if hasattr(entry, 'content'):
+                content = entry.content[0].value
+            elif hasattr(entry, 'summary'):
+                content = entry.summary
+            
+            published_at = parse_date(entry)
+            
+            rows.append((url, title, content, published_at, 'blog', company))
                 
-    except Exception as e:
-        logger.error(f"Error scraping Anthropic HTML: {e}")
-        
-    return count
+        except Exception as e:
+            logger.error(f"Error processing entry for {company}: {e}")
+    return rows
+
+@register_parser('rss')
+def parse_rss(source, body):
+    """Parse an RSS/Atom *body* (or, as a fallback, the feed URL itself)."""
+    feed = feedparser.parse(body)
+    if feed.bozo:
+        logger.warning(f"Feed {source.name} has issues: {feed.bozo_exception}")
+    return parse_feed_entries(source.name, feed)
+
+@register_parser('anthropic_html')
+def parse_anthropic_source(source, body):
+    return parse_anthropic_html(body)
+
+def _absolute_url(link, base_url):
+    return canonicalize_url(link, base_url=base_url.rstrip('/') + '/') if link else link
+
+def _parse_date_text(text):
+    try:
+        return date_parser.parse(text)
+    except (ValueError, TypeError, OverflowError):
+        return datetime.datetime.now()
+
+@register_parser('html_selector')
+def parse_html_selector(source, body):
+    """Generic HTML listing parser driven by CSS selectors in ``source.options``.
+
+    Options: ``item_selector`` (required, matches one link/card per article),
+    ``title_selector``, ``date_selector``, ``link_selector``, ``base_url`` and
+    ``exclude`` (substrings that drop a link).
+    """
+    options = source.options
+    soup = BeautifulSoup(body, 'html.parser')
+    base_url = options.get('base_url', str(httpx.URL(source.url).copy_with(path='/', query=None)))
+    exclude = [x.lower() for x in options.get('exclude', [])]
+
+    rows = []
+    for item in soup.select(options['item_selector']):
+        link_tag = item.select_one(options['link_selector']) if options.get('link_selector') else item
+        link = _absolute_url(link_tag.get('href') if link_tag else None, base_url)
+        if not is_valid_url(link) or any(x in link.lower() for x in exclude):
+            continue
+
+        title_tag = item.select_one(options['title_selector']) if options.get('title_selector') else item
+        title = title_tag.get_text().strip() if title_tag else ''
+        if not title:
+            continue
 
-def scrape_blogs(db_path=DB_PATH):
-    conn = sqlite3.connect(db_path)
+        date_tag = item.select_one(options.get('date_selector', 'time'))
+        dt = _parse_date_text(date_tag.get_text()) if date_tag else datetime.datetime.now()
+
+        rows.append((link, title, '', dt, 'blog', source.name))
+    return rows
+
+def _get_path(obj, path):
+    """Follow a dotted *path* (``"data.items"``) through nested dicts."""
+    for key in path.split('.') if path else []:
+        obj = obj.get(key) if isinstance(obj, dict) else None
+    return obj
+
+@register_parser('json_api')
+def parse_json_api(source, body):
+    """Parse a JSON API listing.
+
+    Options: ``items_path`` (dotted path to the article list) and ``fields``
+    mapping ``url``/``title``/``content``/``published_at`` to dotted paths
+    inside each item.
+    """
+    options = source.options
+    fields = {'url': 'url', 'title': 'title', 'content': 'content', 'published_at': 'published_at'}
+    fields.update(options.get('fields', {}))
+    base_url = options.get('base_url', str(httpx.URL(source.url).copy_with(path='/', query=None)))
+
+    rows = []
+    for item in _get_path(json.loads(body), options.get('items_path', '')) or []:
+        url = _absolute_url(_get_path(item, fields['url']), base_url)
+        title = _get_path(item, fields['title'])
+        if not is_valid_url(url) or not title:
+            continue
+        content = _get_path(item, fields['content']) or ''
+        published = _get_path(item, fields['published_at'])
+        dt = _parse_date_text(published) if published else datetime.datetime.now()
+        rows.append((url, title.strip(), content, dt, 'blog', source.name))
+    return rows
+
+def parse_source(source, body):
+    """Parse one fetched *body* into article rows with *source*'s parser.
+
+    This is a module-level function so it can run inside a
+    ``ProcessPoolExecutor`` worker; only plain tuples travel back to the
+    parent process.
+    """
+    if source.parser not in PARSERS:
+        raise ValueError(f"Unknown parser {source.parser!r} for source {source.name!r}")
+    return PARSERS[source.parser](source, body)
+
+def _offloaded_parser(executor, registry, cached):
+    """Build a ``fetch_sources`` parse hook that runs ``parse_source`` in *executor*."""
+    async def parse(name, result):
+        if _is_unchanged(result, cached.get(name)):
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, parse_source, registry[name], result.body)
+        except Exception as e:
+            # The writer re-parses inline and reports the error there
+            logger.warning(f"Parse worker failed for {name}: {e}")
+            return None
+    return parse
+
+def _is_unchanged(result, cached):
+    """True when *result* needs no parsing: a 304 or a byte-identical body."""
+    if result.not_modified:
+        return True
+    return bool(cached) and cached.get('content_hash') == result.content_hash
+
+def scrape_sources(sources, db_path=DB_PATH, per_host_limit=PER_HOST_LIMIT,
+                   deadline=FETCH_DEADLINE, parse_workers=0):
+    """Fetch *sources* concurrently, then store the parsed entries through a
+    single DB connection, highest priority first.
+
+    Sources answering 304, or returning the same bytes as last time, are not
+    parsed. With *parse_workers* > 0 the feedparser/BeautifulSoup work runs in
+    a process pool while the remaining downloads are still in flight.
+
+    Returns ``{name: outcome}`` where the outcome is the number of new
+    articles, or the exception that made the source fail.
+    """
+    registry = {source.name: source for source in sources}
+    urls = {source.name: source.url for source in sources}
+
+    init_db(db_path)
+    conn = connect(db_path)
     c = conn.cursor()
+    cached = load_validators(c, urls)
+    # Articles stored before the near-duplicate index existed (no-op afterwards)
+    indexed = index_missing_fingerprints(conn)
+    if indexed:
+        logger.info(f"Fingerprinted {indexed} previously stored articles.")
+
+    logger.info(f"Fetching {len(urls)} sources...")
+    if parse_workers > 0:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=parse_workers) as executor:
+            results = asyncio.run(fetch_sources(urls, validators=cached,
+                                                per_host_limit=per_host_limit, deadline=deadline,
+                                                parse=_offloaded_parser(executor, registry, cached)))
+    else:
+        results = asyncio.run(fetch_sources(urls, validators=cached,
+                                            per_host_limit=per_host_limit, deadline=deadline))
     
-    new_articles_count = 0
-    
-    # Custom Anthropic Scraper
-    new_articles_count += scrape_anthropic_html(c)
-    
-    import httpx
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
+    outcomes = {}
 
-    for company, feed_url in COMPANY_FEEDS.items():
-        if company == 'Anthropic': continue
-        logger.info(f"Scraping {company} from {feed_url}...")
+    # Highest priority first, so hot sources land even if a later one fails
+    for source in sources:
+        name, url = source.name, source.url
+        logger.info(f"Scraping {name} from {url}...")
+        result = results.get(name)
         try:
-            # Use httpx to fetch raw content first to handle User-Agent blocking
-            try:
-                response = httpx.get(feed_url, headers=headers, timeout=10.0, follow_redirects=True)
-                response.raise_for_status()
-                feed_content = response.text
-                feed = feedparser.parse(feed_content)
-            except Exception as fetch_err:
-                logger.warning(f"Failed to fetch {company} with httpx, checking feedparser directly: {fetch_err}")
-                feed = feedparser.parse(feed_url)
-            
-            if feed.bozo:
-                logger.warning(f"Feed {company} has issues: {feed.bozo_exception}")
-
-            for entry in feed.entries:
-                try:
-                    url = entry.link
-                    if not is_valid_url(url):
-                        logger.warning(f"Skipping entry with invalid URL from {company}: {url!r}")
-                        continue
-                    title = entry.title
-                    # Some feeds put content in 'content' list, others in 'summary'
-                    content = ''
-                    if hasattr(entry, 'content'):
-                        content = entry.content[0].value
-                    elif hasattr(entry, 'summary'):
-                        content = entry.summary
-                    
-                    published_at = parse_date(entry)
-                    
-                    c.execute('''INSERT OR IGNORE INTO articles 
-                               (url, title, content, published_at, source_type, source_name)
-                               VALUES (?, ?, ?, ?, ?, ?)''',
-                             (url, 
-                              title, 
-                              content,
-                              published_at,
-                              'blog',
-                              company))
-                    
-                    if c.rowcount > 0:
-                        new_articles_count += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error processing entry for {company}: {e}")
+            if isinstance(result, Exception):
+                # feedparser refetches with no timeout of its own, so a source
+                # that timed out gets no second try past the deadline
+                if source.type != 'rss' or isinstance(result, (asyncio.TimeoutError, httpx.TimeoutException)):
+                    logger.error(f"Error scraping {name}: {result}")
+                    outcomes[name] = result
+                    continue
+                logger.warning(f"Failed to fetch {name} with httpx, checking feedparser directly: {result}")
+                rows = parse_source(source, url)
+            elif _is_unchanged(result, cached.get(name)):
+                logger.info(f"{name} unchanged since last fetch, skipping.")
+                save_validators(c, name, url, result, cached.get(name, {}).get('content_hash'))
+                outcomes[name] = 0
+                continue
+            elif result.rows is not None:
+                rows = result.rows
+            else:
+                rows = parse_source(source, result.body)
 
+            count, duplicates = ingest_articles(conn, rows)
+            logger.info(f"{name}: {count} new, {duplicates} already known.")
+            if isinstance(result, Exception):
+                # The feedparser fallback only rescues the source if it found entries
+                outcomes[name] = count if rows else result
+            else:
+                outcomes[name] = count
+                save_validators(c, name, url, result, result.content_hash)
                     
         except Exception as e:
-            logger.error(f"Error scraping {company}: {e}")
+            logger.error(f"Error scraping {name}: {e}")
+            outcomes[name] = e
     
     conn.commit()
+    checkpoint(conn)
     conn.close()
+    return outcomes
+
+def scrape_blogs(db_path=DB_PATH, per_host_limit=PER_HOST_LIMIT, deadline=FETCH_DEADLINE,
+                 parse_workers=0, sources=None):
+    """Scrape every enabled source in ``sources.json`` (or just *sources*).
+
+    Returns the number of new articles stored.
+    """
+    if sources is None:
+        sources = load_sources()
+    outcomes = scrape_sources(sources, db_path=db_path, per_host_limit=per_host_limit,
+                              deadline=deadline, parse_workers=parse_workers)
+    new_articles_count = sum(o for o in outcomes.values() if not isinstance(o, Exception))
     logger.info(f"Scraping complete. {new_articles_count} new articles.")
     return new_articles_count
 
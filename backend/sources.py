@@ -0,0 +1,63 @@
+import json
+import os
+from dataclasses import dataclass, field
+
+SOURCES_PATH = os.path.join(os.path.dirname(__file__), 'sources.json')
+
+# Source types and the parser each one uses unless the config names another
+DEFAULT_PARSERS = {
+    'rss': 'rss',
+    'html': 'html_selector',
+    'json': 'json_api',
+}
+
+DEFAULT_FETCH_INTERVAL = 6 * 60 * 60  # seconds
+DEFAULT_PRIORITY = 0
+
+@dataclass(frozen=True)
+class Source:
+    """One scraped source as declared in ``sources.json``.
+
+    ``options`` carries parser-specific settings (CSS selectors for HTML
+    sources, the item path and field mapping for JSON APIs).
+    """
+    name: str
+    type: str
+    url: str
+    parser: str
+    fetch_interval: int = DEFAULT_FETCH_INTERVAL
+    priority: int = DEFAULT_PRIORITY
+    enabled: bool = True
+    options: dict = field(default_factory=dict, hash=False, compare=False)
+
+def _build_source(entry):
+    missing = [key for key in ('name', 'type', 'url') if not entry.get(key)]
+    if missing:
+        raise ValueError(f"Source entry {entry!r} is missing {', '.join(missing)}")
+    if entry['type'] not in DEFAULT_PARSERS:
+        raise ValueError(f"Source {entry['name']!r} has unknown type {entry['type']!r}")
+    return Source(
+        name=entry['name'],
+        type=entry['type'],
+        url=entry['url'],
+        parser=entry.get('parser') or DEFAULT_PARSERS[entry['type']],
+        fetch_interval=int(entry.get('fetch_interval', DEFAULT_FETCH_INTERVAL)),
+        priority=int(entry.get('priority', DEFAULT_PRIORITY)),
+        enabled=bool(entry.get('enabled', True)),
+        options=entry.get('options', {}),
+    )
+
+def load_sources(path=SOURCES_PATH, include_disabled=False):
+    """Load the source registry from *path*, highest priority first."""
+    with open(path) as f:
+        config = json.load(f)
+
+    sources = [_build_source(entry) for entry in config.get('sources', [])]
+    names = [s.name for s in sources]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate source names in {path}: {sorted(duplicates)}")
+
+    if not include_disabled:
+        sources = [s for s in sources if s.enabled]
+    return sorted(sources, key=lambda s: s.priority, reverse=True)
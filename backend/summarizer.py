@@ -1,138 +1,286 @@
-import sqlite3
+import asyncio
+import json
 import ollama
 from datetime import datetime, timedelta
-from backend.database import DB_PATH
+from backend.database import DB_PATH, init_db, get_db_connection, bump_generation
+from backend import summary_cache
+from backend.content import unpack
+from backend.trends import (PROMPT_ARTICLE_LIMIT, article_list, generate_trends,
+                            fold_new_articles, map_reduce_trends, cluster_trends)
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_db_connection(db_path=DB_PATH):
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Summarization queue. The ORDER BY must match idx_articles_unsummarized
+# (see init_db) exactly, or SQLite falls back to scanning and sorting.
+UNSUMMARIZED_QUERY = """
+    SELECT a.id, a.title, b.body AS content, b.compressed, a.source_name FROM articles a
+    LEFT JOIN article_content b ON b.article_id = a.id
+    WHERE a.summary IS NULL OR a.summary = ''
+    ORDER BY CASE WHEN a.source_name = 'Anthropic' THEN 1 ELSE 2 END, a.published_at DESC
+"""
+
+WINDOW_QUERY = "SELECT id, title, source_name, published_at, summary FROM articles WHERE published_at > ? ORDER BY published_at DESC"
+
+ARTICLE_SUMMARY_PROMPT = "Summarize this news in exactly one concise sentence. Do not use 'Here is a summary' or similar intro. Just the sentence.\n\nTitle: {title}\nContent: {content}"
+
+BATCH_SUMMARY_PROMPT = """Summarize each news item below in exactly one concise sentence.
+Do not use 'Here is a summary' or similar intro.
+
+Return ONLY a valid JSON object with this structure:
+{{"summaries": [{{"id": 1, "summary": "One sentence."}}]}}
+
+Items:
+{items}
+"""
+
+CONTENT_SNIPPET_CHARS = 1000
+BATCH_SNIPPET_CHARS = 400
+
+def _content_snippet(article, size=CONTENT_SNIPPET_CHARS):
+    return article['content'][:size] if article['content'] else article['title']
+
+async def _summarize_one(client, model, article):
+    prompt = ARTICLE_SUMMARY_PROMPT.format(title=article['title'], content=_content_snippet(article))
+    response = await client.chat(model=model, messages=[
+        {'role': 'user', 'content': prompt},
+    ])
+    return {article['id']: response['message']['content'].strip()}
+
+async def _summarize_batch(client, model, articles):
+    """Summarize several *articles* with one structured-JSON prompt.
+
+    Articles the model skips (or a reply that isn't valid JSON) fall back to
+    one prompt per article.
+    """
+    if len(articles) == 1:
+        return await _summarize_one(client, model, articles[0])
+
+    items = "\n\n".join(
+        f"[{a['id']}] Title: {a['title']}\nContent: {_content_snippet(a, BATCH_SNIPPET_CHARS)}"
+        for a in articles
+    )
+    response = await client.chat(model=model, format='json', messages=[
+        {'role': 'user', 'content': BATCH_SUMMARY_PROMPT.format(items=items)},
+    ])
+
+    wanted = {a['id'] for a in articles}
+    results = {}
+    try:
+        for entry in json.loads(response['message']['content']).get('summaries', []):
+            summary = str(entry.get('summary') or '').strip()
+            if entry.get('id') in wanted and summary:
+                results[entry['id']] = summary
+    except (json.JSONDecodeError, AttributeError):
+        logger.warning("LLM returned invalid JSON for a summary batch, retrying one by one.")
 
-def generate_article_summaries(db_path=DB_PATH, model='qwen2.5:0.5b-instruct'):
-    """Generate one-line summaries for articles that don't have one."""
+    for article in articles:
+        if article['id'] not in results:
+            results.update(await _summarize_one(client, model, article))
+    return results
+
+async def _summarize_articles(conn, articles, model, concurrency, batch_size, commit_every, host,
+                              keys, duplicates):
+    """Run *concurrency* workers over batches of *articles*, committing results
+    to *conn* every *commit_every* summaries.
+
+    *keys* maps article ids to their summary cache key; each fresh summary is
+    cached and also applied to the ids listed for it in *duplicates*.
+    """
+    client = ollama.AsyncClient(host=host)
+    queue = asyncio.Queue()
+    for i in range(0, len(articles), batch_size):
+        queue.put_nowait(articles[i:i + batch_size])
+
+    pending = []
+    stored = 0
+
+    def flush():
+        nonlocal stored
+        if pending:
+            conn.executemany("UPDATE articles SET summary = ? WHERE id = ?",
+                             [(summary_text, article_id) for article_id, summary_text in pending])
+            summary_cache.store(conn, [(keys[article_id], summary_text)
+                                       for article_id, summary_text in pending if article_id in keys])
+            bump_generation(conn)
+            conn.commit()
+            stored += len(pending)
+            pending.clear()
+
+    async def worker():
+        while True:
+            try:
+                batch = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                results = await _summarize_batch(client, model, batch)
+            except Exception as e:
+                logger.error(f"Error summarizing articles {[a['id'] for a in batch]}: {e}")
+                continue
+            for article_id, summary_text in results.items():
+                logger.info(f"Summarized article {article_id}: {summary_text[:50]}...")
+                pending.append((article_id, summary_text))
+                pending.extend((dup_id, summary_text) for dup_id in duplicates.get(article_id, []))
+            if len(pending) >= commit_every:
+                flush()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    flush()
+    return stored
+
+def generate_article_summaries(db_path=DB_PATH, model='qwen2.5:0.5b-instruct', limit=50,
+                               concurrency=1, batch_size=1, commit_every=20, host=None):
+    """Generate one-line summaries for articles that don't have one.
+
+    Up to *concurrency* requests are in flight against the Ollama server at
+    once, each carrying *batch_size* articles (packed into one JSON prompt
+    when > 1). Results are committed every *commit_every* summaries. Pass
+    ``limit=None`` to drain the whole backlog.
+
+    Articles whose (model, prompt, title, content) hash is already in the
+    summary cache, or repeats another article in this run, cost no LLM call.
+    """
+    init_db(db_path)
     conn = get_db_connection(db_path)
     c = conn.cursor()
     
-    # fetch articles without summary
     # fetch articles without summary, prioritizing Anthropic
-    c.execute("""
-        SELECT id, title, content, source_name FROM articles 
-        WHERE summary IS NULL OR summary = '' 
-        ORDER BY CASE WHEN source_name = 'Anthropic' THEN 1 ELSE 2 END, published_at DESC 
-        LIMIT 50
-    """)
-    articles = c.fetchall()
+    if limit is None:
+        c.execute(UNSUMMARIZED_QUERY)
+    else:
+        c.execute(UNSUMMARIZED_QUERY + " LIMIT ?", (limit,))
+    articles = [dict(a, content=unpack(a['content'], a['compressed'])) for a in c.fetchall()]
     
     if not articles:
         logger.info("No articles need summarization.")
         conn.close()
         return 0
     
-    count = 0
+    # Serve what we can from the cache and only send one copy of each duplicate
+    keys = {
+        a['id']: summary_cache.cache_key(model, ARTICLE_SUMMARY_PROMPT, a['title'], _content_snippet(a))
+        for a in articles
+    }
+    cached = summary_cache.lookup(conn, keys.values())
+    hits = [(cached[keys[a['id']]], a['id']) for a in articles if keys[a['id']] in cached]
+    if hits:
+        conn.executemany("UPDATE articles SET summary = ? WHERE id = ?", hits)
+        bump_generation(conn)
+    conn.commit()
+
+    to_summarize = []
+    duplicates = {}
+    first_by_key = {}
     for article in articles:
-        try:
-            # Prepare prompt for one-sentence summary
-            content_snippet = article['content'][:1000] if article['content'] else article['title']
-            prompt = f"Summarize this news in exactly one concise sentence. Do not use 'Here is a summary' or similar intro. Just the sentence.\n\nTitle: {article['title']}\nContent: {content_snippet}"
-            
-            response = ollama.chat(model=model, messages=[
-                {'role': 'user', 'content': prompt},
-            ])
-            
-            summary_text = response['message']['content'].strip()
-            
-            # Update DB
-            c.execute("UPDATE articles SET summary = ? WHERE id = ?", (summary_text, article['id']))
-            conn.commit()
-            logger.info(f"Summarized article {article['id']}: {summary_text[:50]}...")
-            count += 1
-            
-        except Exception as e:
-            logger.error(f"Error summarizing article {article['id']}: {e}")
-            
+        key = keys[article['id']]
+        if key in cached:
+            continue
+        if key in first_by_key:
+            duplicates.setdefault(first_by_key[key], []).append(article['id'])
+        else:
+            first_by_key[key] = article['id']
+            to_summarize.append(article)
+    logger.info(f"{len(hits)} summaries served from cache, "
+                f"{len(articles) - len(hits) - len(to_summarize)} duplicates, "
+                f"{len(to_summarize)} sent to the LLM.")
+
+    count = len(hits)
+    if to_summarize:
+        count += asyncio.run(_summarize_articles(conn, to_summarize, model, max(concurrency, 1),
+                                                 max(batch_size, 1), max(commit_every, 1), host,
+                                                 keys, duplicates))
+    summary_cache.evict(conn)
     conn.close()
     return count
 
-if __name__ == "__main__":
-    generate_article_summaries()
+TEXT_SUMMARY_PROMPT = """Briefly summarize these AI news headlines in 2-3 sentences. Be concise and highlight the most important updates.
+
+Articles:
+{article_list}
+"""
+
+def _timeframe_key(timeframe_days):
+    return f"{timeframe_days}d" if timeframe_days < 365 else "1y"
+
+def _load_previous(c, timeframe_key):
+    """Return ``(summary_text, covered_article_ids)`` of the stored summary, if any."""
+    c.execute('''SELECT summary_text FROM summaries
+                 WHERE timeframe = ?
+                 ORDER BY generated_at DESC
+                 LIMIT 1''', (timeframe_key,))
+    row = c.fetchone()
+    c.execute("SELECT article_ids FROM summary_coverage WHERE timeframe = ?", (timeframe_key,))
+    coverage = c.fetchone()
+    if row is None or coverage is None:
+        return None, None
+    return row['summary_text'], set(json.loads(coverage['article_ids']))
+
+def generate_summary(timeframe_days, db_path=DB_PATH, model='qwen2.5:0.5b-instruct', incremental=True,
+                     trend_method='llm'):
+    """Generate the summary for the last *timeframe_days* days.
+
+    With *incremental* (the default) the article IDs covered by the stored
+    summary are tracked in ``summary_coverage``: an unchanged window returns
+    the stored summary without calling the LLM, and trend summaries (> 7 days)
+    only fold the newly published articles into the existing trend JSON.
+    Trend windows too large for one prompt are map-reduced over cached
+    per-day/per-week buckets instead (see ``backend.trends``).
 
-def generate_summary(timeframe_days, db_path=DB_PATH, model='qwen2.5:0.5b-instruct'):
+    ``trend_method='cluster'`` groups the window locally (TF-IDF + k-means)
+    and only asks the LLM to name each cluster, so trend membership is
+    deterministic and always references real articles.
+    """
+    init_db(db_path)
     conn = get_db_connection(db_path)
     c = conn.cursor()
+    timeframe_key = _timeframe_key(timeframe_days)
     
     # 1. Fetch articles
     cutoff = datetime.now() - timedelta(days=timeframe_days)
-    c.execute("SELECT id, title, source_name, published_at FROM articles WHERE published_at > ? ORDER BY published_at DESC", (cutoff,))
+    c.execute(WINDOW_QUERY, (cutoff,))
     articles = c.fetchall()
     
     if not articles:
         conn.close()
         return None
-        
-    article_list = "\n".join([f"[{a['id']}] {a['title']}" for a in articles[:50]])
+
+    window_ids = {a['id'] for a in articles}
+    previous_text, covered = _load_previous(c, timeframe_key) if incremental else (None, None)
+    if covered == window_ids:
+        logger.info(f"Summary for {timeframe_key} already covers all {len(articles)} articles, skipping.")
+        conn.close()
+        return previous_text
     
     # 2. Generate Summary based on timeframe
     summary_text = None
     try:
-        import json
-        
         if timeframe_days > 7:
-            # Trend Analysis Prompt (JSON)
-            prompt = f"""
-            Analyze the following AI news articles (IDs are in brackets).
-            Group them into 2-3 major trends.
-            
-            Return ONLY a valid JSON object with this structure:
-            {{
-                "trends": [
-                    {{
-                        "name": "Short Headline",
-                        "summary": "Concise summary of the trend.",
-                        "article_ids": [1, 2]
-                    }}
-                ]
-            }}
-            
-            Articles:
-            {article_list}
-            """
-            
-            response = ollama.chat(model=model, format='json', messages=[
-                {'role': 'user', 'content': prompt},
-            ])
-            
-            summary_text = response['message']['content']
-            
-            # Validate JSON and remove hallucinated article IDs
-            real_ids = {a['id'] for a in articles}
-            try:
-                parsed = json.loads(summary_text)
-                for trend in parsed.get('trends', []):
-                    original_ids = trend.get('article_ids', [])
-                    valid_ids = [i for i in original_ids if i in real_ids]
-                    if len(valid_ids) < len(original_ids):
-                        removed = set(original_ids) - set(valid_ids)
-                        logger.warning(
-                            f"Removed hallucinated article IDs {removed} "
-                            f"from trend '{trend.get('name')}'"
-                        )
-                    trend['article_ids'] = valid_ids
-                summary_text = json.dumps(parsed)
-            except json.JSONDecodeError:
-                logger.warning("LLM failed to return valid JSON, falling back to text.")
+            previous = None
+            if previous_text is not None:
+                try:
+                    previous = json.loads(previous_text)
+                except json.JSONDecodeError:
+                    previous = None
+            has_trends = isinstance(previous, dict) and bool(previous.get('trends'))
+            new_articles = [a for a in articles if a['id'] not in (covered or set())]
+
+            if trend_method == 'cluster':
+                summary_text = cluster_trends(conn, articles, model)
+            elif has_trends and len(new_articles) <= PROMPT_ARTICLE_LIMIT:
+                logger.info(f"Folding {len(new_articles)} new articles into the {timeframe_key} trends")
+                summary_text = json.dumps(fold_new_articles(previous, new_articles, window_ids, model))
+            elif len(articles) > PROMPT_ARTICLE_LIMIT:
+                # Too many for one prompt: summarize per day/week bucket, then reduce
+                logger.info(f"Map-reducing {len(articles)} articles for {timeframe_key}")
+                summary_text = map_reduce_trends(conn, articles, timeframe_days, model)
+            else:
+                summary_text = generate_trends(articles, model)
         else:
             # Short text summary for 1d/7d
-            prompt = f"""Briefly summarize these AI news headlines in 2-3 sentences. Be concise and highlight the most important updates.
-
-Articles:
-{article_list}
-"""
             response = ollama.chat(model=model, messages=[
-                {'role': 'user', 'content': prompt},
+                {'role': 'user', 'content': TEXT_SUMMARY_PROMPT.format(article_list=article_list(articles))},
             ])
             summary_text = response['message']['content'].strip()
 
@@ -141,11 +289,13 @@ Articles:
             return None
 
         # 3. Store in DB
-        timeframe_key = f"{timeframe_days}d" if timeframe_days < 365 else "1y"
-        
         c.execute("DELETE FROM summaries WHERE timeframe = ?", (timeframe_key,))
         c.execute("INSERT INTO summaries (timeframe, summary_text, article_count) VALUES (?, ?, ?)", 
                  (timeframe_key, summary_text, len(articles)))
+        c.execute('''INSERT OR REPLACE INTO summary_coverage (timeframe, article_ids, updated_at)
+                     VALUES (?, ?, CURRENT_TIMESTAMP)''',
+                  (timeframe_key, json.dumps(sorted(window_ids))))
+        bump_generation(c)
         conn.commit()
         logger.info(f"Generated summary for {timeframe_key}")
         
@@ -156,3 +306,18 @@ Articles:
         
     conn.close()
     return summary_text
+
+if __name__ == "__main__":
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Summarize articles that have no summary yet")
+    arg_parser.add_argument('--limit', type=int, default=50, help="articles to process (0 = all)")
+    arg_parser.add_argument('--concurrency', type=int, default=1, help="parallel Ollama requests")
+    arg_parser.add_argument('--batch-size', type=int, default=1, help="articles packed per prompt")
+    arg_parser.add_argument('--trends', action='store_true', help="also refresh the 1d/7d/30d/1y summaries")
+    arg_parser.add_argument('--trend-method', choices=['llm', 'cluster'], default='llm')
+    args = arg_parser.parse_args()
+    generate_article_summaries(limit=args.limit or None, concurrency=args.concurrency,
+                               batch_size=args.batch_size)
+    if args.trends:
+        for days in (1, 7, 30, 365):
+            generate_summary(days, trend_method=args.trend_method)
@@ -0,0 +1,61 @@
+import hashlib
+import re
+
+# Evict least recently used entries once the cached summaries exceed this size
+MAX_CACHE_BYTES = 8 * 1024 * 1024
+
+LOOKUP_CHUNK_SIZE = 500
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _normalize(text):
+    return _WHITESPACE_RE.sub(' ', (text or '')).strip().lower()
+
+def cache_key(model, template, title, content):
+    """Hash of everything that determines a summary.
+
+    Title and content are case- and whitespace-normalized so syndicated copies
+    of the same story map to the same key.
+    """
+    parts = [model, template, _normalize(title), _normalize(content)]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+def lookup(conn, keys):
+    """Return ``{key: summary}`` for the cached *keys* and mark them as used."""
+    keys = list(keys)
+    found = {}
+    for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[i:i + LOOKUP_CHUNK_SIZE]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f"SELECT key, summary FROM summary_cache WHERE key IN ({placeholders})", chunk)
+        found.update(rows.fetchall())
+    if found:
+        conn.executemany("UPDATE summary_cache SET last_used_at = CURRENT_TIMESTAMP WHERE key = ?",
+                         [(key,) for key in found])
+    return found
+
+def store(conn, entries):
+    """Add ``(key, summary)`` *entries* to the cache (caller commits)."""
+    conn.executemany('''INSERT OR REPLACE INTO summary_cache (key, summary, size)
+                        VALUES (?, ?, ?)''',
+                     [(key, summary, len(summary.encode('utf-8'))) for key, summary in entries])
+
+def evict(conn, max_bytes=MAX_CACHE_BYTES):
+    """Drop least recently used entries until the cache fits in *max_bytes*.
+
+    Returns the number of entries removed.
+    """
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM summary_cache").fetchone()[0]
+    if total <= max_bytes:
+        return 0
+
+    doomed = []
+    rows = conn.execute("SELECT key, size FROM summary_cache ORDER BY last_used_at, created_at")
+    for key, size in rows.fetchall():
+        if total <= max_bytes:
+            break
+        doomed.append((key,))
+        total -= size
+    conn.executemany("DELETE FROM summary_cache WHERE key = ?", doomed)
+    conn.commit()
+    return len(doomed)
@@ -0,0 +1,319 @@
+import concurrent.futures
+import hashlib
+import json
+import logging
+import ollama
+from collections import defaultdict
+from dateutil import parser as date_parser
+
+logger = logging.getLogger(__name__)
+
+TREND_PROMPT = """
+            Analyze the following AI news articles (IDs are in brackets).
+            Group them into 2-3 major trends.
+            
+            Return ONLY a valid JSON object with this structure:
+            {{
+                "trends": [
+                    {{
+                        "name": "Short Headline",
+                        "summary": "Concise summary of the trend.",
+                        "article_ids": [1, 2]
+                    }}
+                ]
+            }}
+            
+            Articles:
+            {article_list}
+            """
+
+TREND_UPDATE_PROMPT = """
+            These are the current AI news trends:
+            {trend_list}
+
+            New articles have been published since (IDs are in brackets).
+            Assign each new article to an existing trend (reuse its exact name and
+            update its summary if needed) or group them into a new trend.
+
+            Return ONLY a valid JSON object with this structure, listing only
+            trends that received new articles:
+            {{
+                "trends": [
+                    {{
+                        "name": "Short Headline",
+                        "summary": "Concise summary of the trend.",
+                        "article_ids": [1, 2]
+                    }}
+                ]
+            }}
+
+            New articles:
+            {article_list}
+            """
+
+PROMPT_ARTICLE_LIMIT = 50
+
+def article_list(articles):
+    return "\n".join([f"[{a['id']}] {a['title']}" for a in articles[:PROMPT_ARTICLE_LIMIT]])
+
+def drop_unknown_ids(parsed, real_ids):
+    """Remove hallucinated (or no longer in-window) article IDs from every trend."""
+    for trend in parsed.get('trends', []):
+        original_ids = trend.get('article_ids', [])
+        valid_ids = [i for i in original_ids if i in real_ids]
+        if len(valid_ids) < len(original_ids):
+            removed = set(original_ids) - set(valid_ids)
+            logger.warning(
+                f"Removed hallucinated article IDs {removed} "
+                f"from trend '{trend.get('name')}'"
+            )
+        trend['article_ids'] = valid_ids
+    return parsed
+
+def generate_trends(articles, model):
+    """Full trend analysis of *articles*; returns the JSON text from the LLM."""
+    response = ollama.chat(model=model, format='json', messages=[
+        {'role': 'user', 'content': TREND_PROMPT.format(article_list=article_list(articles))},
+    ])
+    summary_text = response['message']['content']
+
+    # Validate JSON and remove hallucinated article IDs
+    try:
+        parsed = drop_unknown_ids(json.loads(summary_text), {a['id'] for a in articles})
+        summary_text = json.dumps(parsed)
+    except json.JSONDecodeError:
+        logger.warning("LLM failed to return valid JSON, falling back to text.")
+    return summary_text
+
+def fold_new_articles(existing, new_articles, window_ids, model):
+    """Merge *new_articles* into the *existing* trend dict.
+
+    Articles that left the window are pruned first; when nothing new arrived
+    no LLM call is made. Trends returned by the model are matched to existing
+    ones by name (case-insensitive) and otherwise appended.
+    """
+    trends = existing.get('trends', [])
+    for trend in trends:
+        trend['article_ids'] = [i for i in trend.get('article_ids', []) if i in window_ids]
+
+    if new_articles:
+        trend_list = "\n".join(f"- {t.get('name')}: {t.get('summary')}" for t in trends)
+        prompt = TREND_UPDATE_PROMPT.format(trend_list=trend_list,
+                                            article_list=article_list(new_articles))
+        response = ollama.chat(model=model, format='json', messages=[
+            {'role': 'user', 'content': prompt},
+        ])
+        update = drop_unknown_ids(json.loads(response['message']['content']),
+                                  {a['id'] for a in new_articles})
+
+        by_name = {str(t.get('name', '')).strip().lower(): t for t in trends}
+        for trend in update.get('trends', []):
+            match = by_name.get(str(trend.get('name', '')).strip().lower())
+            if match is None:
+                trends.append(trend)
+                continue
+            match['article_ids'] = match['article_ids'] + [
+                i for i in trend.get('article_ids', []) if i not in match['article_ids']
+            ]
+            if trend.get('summary'):
+                match['summary'] = trend['summary']
+
+    existing['trends'] = [t for t in trends if t.get('article_ids')]
+    return existing
+
+# Map-reduce over large windows: each bucket of articles is summarized on its
+# own (and cached), then bucket trends are merged a bounded number at a time.
+REDUCE_FANIN = 24        # trends merged per reduce call
+MAP_CONCURRENCY = 2      # parallel LLM calls per level
+
+REDUCE_PROMPT = """
+            Merge the following AI news trends (trend numbers are in brackets)
+            into 2-3 major trends.
+
+            Return ONLY a valid JSON object with this structure:
+            {{
+                "trends": [
+                    {{
+                        "name": "Short Headline",
+                        "summary": "Concise summary of the trend.",
+                        "source_trends": [1, 2]
+                    }}
+                ]
+            }}
+
+            Trends:
+            {trend_list}
+            """
+
+def bucket_key(published_at, timeframe_days):
+    """Daily buckets for windows up to a month, ISO weeks beyond that."""
+    dt = date_parser.parse(str(published_at))
+    if timeframe_days <= 31:
+        return f"day:{dt.date().isoformat()}"
+    year, week, _ = dt.isocalendar()
+    return f"week:{year}-W{week:02d}"
+
+def make_buckets(articles, timeframe_days):
+    """Group *articles* into ``{bucket: [articles]}``, splitting any bucket
+    larger than ``PROMPT_ARTICLE_LIMIT`` so every map prompt stays bounded."""
+    grouped = defaultdict(list)
+    for article in articles:
+        grouped[bucket_key(article['published_at'], timeframe_days)].append(article)
+
+    buckets = {}
+    for key, members in grouped.items():
+        if len(members) <= PROMPT_ARTICLE_LIMIT:
+            buckets[key] = members
+            continue
+        for part, start in enumerate(range(0, len(members), PROMPT_ARTICLE_LIMIT)):
+            buckets[f"{key}#{part}"] = members[start:start + PROMPT_ARTICLE_LIMIT]
+    return buckets
+
+def _articles_hash(articles):
+    ids = ','.join(str(i) for i in sorted(a['id'] for a in articles))
+    return hashlib.sha256(ids.encode('utf-8')).hexdigest()
+
+def _map_bucket(articles, model):
+    parsed = json.loads(generate_trends(articles, model))
+    return [t for t in parsed.get('trends', []) if t.get('article_ids')]
+
+def summarize_buckets(conn, buckets, model, concurrency=MAP_CONCURRENCY):
+    """Map step: trend list per bucket, reusing ``trend_buckets`` rows whose
+    article set is unchanged. Returns ``{bucket: [trends]}``.
+
+    Buckets that succeed are cached even if others fail, but any failure
+    raises afterwards: a partial result would leave the failed buckets'
+    articles out of the trends while still counting them as covered.
+    """
+    hashes = {key: _articles_hash(members) for key, members in buckets.items()}
+    rows = conn.execute("SELECT bucket, article_hash, summary_text FROM trend_buckets WHERE model = ?",
+                        (model,)).fetchall()
+    cached = {bucket: json.loads(text) for bucket, article_hash, text in rows
+              if bucket in hashes and hashes[bucket] == article_hash}
+
+    stale = [key for key in buckets if key not in cached]
+    failed = []
+    logger.info(f"Trend buckets: {len(cached)} cached, {len(stale)} to summarize")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(_map_bucket, buckets[key], model): key for key in stale}
+        for future in concurrent.futures.as_completed(futures):
+            key = futures[future]
+            try:
+                cached[key] = future.result()
+            except Exception as e:
+                logger.warning(f"Trend bucket {key} failed: {e}")
+                failed.append(key)
+                continue
+            conn.execute('''INSERT OR REPLACE INTO trend_buckets
+                            (bucket, model, article_hash, summary_text, created_at)
+                            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)''',
+                         (key, model, hashes[key], json.dumps(cached[key])))
+    conn.commit()
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(buckets)} trend buckets failed")
+    return {key: cached[key] for key in buckets}
+
+def _reduce_group(trends, model):
+    """Merge one bounded group of *trends*; article IDs are unioned from the
+    input trends each output names, so they are valid by construction."""
+    trend_list = "\n".join(f"[{n}] {t.get('name')}: {t.get('summary')}" for n, t in enumerate(trends, 1))
+    response = ollama.chat(model=model, format='json', messages=[
+        {'role': 'user', 'content': REDUCE_PROMPT.format(trend_list=trend_list)},
+    ])
+    merged = []
+    for trend in json.loads(response['message']['content']).get('trends', []):
+        ids = []
+        for n in trend.get('source_trends', []):
+            if isinstance(n, int) and 1 <= n <= len(trends):
+                ids.extend(i for i in trends[n - 1]['article_ids'] if i not in ids)
+        if ids:
+            merged.append({'name': trend.get('name'), 'summary': trend.get('summary'), 'article_ids': ids})
+    return merged
+
+def reduce_trends(trends, model, concurrency=MAP_CONCURRENCY):
+    """Reduce step: merge *trends* ``REDUCE_FANIN`` at a time until one call
+    can produce the final 2-3 trends."""
+    while True:
+        groups = [trends[i:i + REDUCE_FANIN] for i in range(0, len(trends), REDUCE_FANIN)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            reduced = [t for group in executor.map(lambda g: _reduce_group(g, model), groups) for t in group]
+        if not reduced:
+            raise ValueError("Trend reduce step returned no usable trends")
+        if len(groups) == 1 or len(reduced) >= len(trends):
+            return reduced
+        trends = reduced
+
+def map_reduce_trends(conn, articles, timeframe_days, model, concurrency=MAP_CONCURRENCY):
+    """Trend JSON text covering every article in the window."""
+    buckets = summarize_buckets(conn, make_buckets(articles, timeframe_days), model, concurrency)
+    bucket_trends = [t for key in sorted(buckets) for t in buckets[key]]
+    if not bucket_trends:
+        raise ValueError("Trend map step returned no usable trends")
+    if len(buckets) > 1:
+        bucket_trends = reduce_trends(bucket_trends, model, concurrency)
+    return json.dumps({'trends': bucket_trends})
+
+# Cluster-first trends: articles are grouped locally (TF-IDF + k-means) and the
+# LLM only names and describes each precomputed cluster.
+CLUSTER_PROMPT = """
+            The following AI news articles were grouped together because they
+            cover the same topic (key terms: {terms}).
+
+            Return ONLY a valid JSON object with this structure:
+            {{
+                "name": "Short Headline",
+                "summary": "Concise summary of the trend."
+            }}
+
+            Articles:
+            {article_list}
+            """
+
+def _cluster_document(article):
+    summary = article['summary'] if 'summary' in article.keys() else None
+    return f"{article['title']} {summary or ''}"
+
+def _name_cluster(articles, terms, model):
+    prompt = CLUSTER_PROMPT.format(terms=', '.join(terms) or 'n/a', article_list=article_list(articles))
+    response = ollama.chat(model=model, format='json', messages=[
+        {'role': 'user', 'content': prompt},
+    ])
+    parsed = json.loads(response['message']['content'])
+    return {'name': parsed.get('name') or ', '.join(terms[:3]).title(), 'summary': parsed.get('summary', '')}
+
+def cluster_trends(conn, articles, model, concurrency=MAP_CONCURRENCY):
+    """Trend JSON text built from local clusters of *articles*.
+
+    Membership comes from ``backend.clustering``, so every article_id is real.
+    Names are cached in ``trend_buckets`` per cluster membership and the
+    remaining clusters are named in parallel.
+    """
+    from backend.clustering import cluster_documents
+
+    clusters = cluster_documents([_cluster_document(a) for a in articles])
+    groups = [[articles[i] for i in cluster['members']] for cluster in clusters]
+    keys = [f"cluster:{_articles_hash(group)}" for group in groups]
+
+    rows = conn.execute("SELECT bucket, summary_text FROM trend_buckets WHERE model = ?", (model,)).fetchall()
+    cached = {bucket: json.loads(text) for bucket, text in rows if bucket in keys}
+
+    stale = [n for n, key in enumerate(keys) if key not in cached]
+    logger.info(f"Trend clusters: {len(clusters)} found, {len(stale)} to name")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(_name_cluster, groups[n], clusters[n]['terms'], model): n for n in stale}
+        for future in concurrent.futures.as_completed(futures):
+            n = futures[future]
+            try:
+                cached[keys[n]] = future.result()
+            except Exception as e:
+                logger.warning(f"Falling back to key terms for cluster {n}: {e}")
+                cached[keys[n]] = {'name': ', '.join(clusters[n]['terms'][:3]).title(), 'summary': ''}
+                continue
+            conn.execute('''INSERT OR REPLACE INTO trend_buckets
+                            (bucket, model, article_hash, summary_text, created_at)
+                            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)''',
+                         (keys[n], model, keys[n].split(':', 1)[1], json.dumps(cached[keys[n]])))
+    conn.commit()
+
+    trends = [dict(cached[key], article_ids=[a['id'] for a in group]) for key, group in zip(keys, groups)]
+    return json.dumps({'trends': trends})
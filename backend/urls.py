@@ -0,0 +1,46 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid',
+    'ref', 'ref_src', 'cmpid', '_hsenc', '_hsmi',
+})
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def _is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def canonicalize_url(url, base_url=None):
+    """Normalize *url* so variants of one link share a single ``articles.url`` key.
+
+    Relative links are resolved against *base_url*. The scheme and host are
+    lowercased, default ports, fragments, tracking parameters (``utm_*``,
+    ``fbclid``...) and trailing slashes are dropped, and the remaining query
+    parameters are sorted. Anything that isn't an absolute HTTP(S) URL is
+    returned unchanged.
+    """
+    if not url:
+        return url
+    url = url.strip()
+    if base_url:
+        url = urljoin(base_url, url)
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.lower()
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _is_tracking(k)))
+    return urlunsplit((scheme, host, path, query, ''))
@@ -1,12 +1,55 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import TimeframeSelector from './components/TimeframeSelector';
 import SummaryCard from './components/SummaryCard';
 import ArticleStream from './components/ArticleStream';
 import ReactMarkdown from 'react-markdown';
+import { toRows, searchSnapshot, searchTerms } from './snapshot';
+
+const SHARD_ROOT = './data/';
+
+const TIMEFRAME_DAYS = {
+  '1d': 1,
+  '7d': 7,
+  '30d': 30,
+  '1y': 365
+};
+
+// Shards are kept as fetched; each tab decodes only the articles inside its window
+async function fetchShard(entry) {
+  // Shard names embed a content hash, so a cached copy is never stale
+  const response = await fetch(`${SHARD_ROOT}${entry.file}`, { cache: 'force-cache' });
+  if (!response.ok) throw new Error(`Failed to load ${entry.file}: ${response.statusText}`);
+  return response.json();
+}
+
+function tabCutoffSeconds(tab) {
+  return Math.floor(Date.now() / 1000) - TIMEFRAME_DAYS[tab] * 86400;
+}
+
+// First paint needs only the 7d shard; 1y is stitched from month shards
+function shardsForTab(manifest, tab) {
+  if (manifest.timeframes[tab]) return [manifest.timeframes[tab]];
+  if (tab === '1d') return [manifest.timeframes['7d']];
+  const cutoff = new Date();
+  cutoff.setFullYear(cutoff.getFullYear() - 1);
+  const firstMonth = cutoff.toISOString().slice(0, 7);
+  return Object.entries(manifest.months)
+    .filter(([month]) => month >= firstMonth)
+    .map(([, entry]) => entry);
+}
+
+function loadShard(cache, entry) {
+  if (!cache.has(entry.file)) cache.set(entry.file, fetchShard(entry));
+  return cache.get(entry.file);
+}
 
 function App() {
   const [activeTab, setActiveTab] = useState('7d');
   const [allData, setAllData] = useState(null);
+  const [manifest, setManifest] = useState(null);
+  const shardCache = useRef(new Map());
+  const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
   const [articles, setArticles] = useState([]);
   const [trendSummary, setTrendSummary] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -22,10 +65,19 @@ function App() {
     async function loadData() {
       try {
         setLoading(true);
+        // Prefer the sharded snapshot; fall back to the monolithic data.json
+        // The manifest is the only mutable file: always revalidate it
+        const manifestResponse = await fetch(`${SHARD_ROOT}manifest.json`, { cache: 'no-cache' });
+        if (manifestResponse.ok) {
+          const manifest = await manifestResponse.json();
+          const summaries = await fetchShard(manifest.summaries);
+          setManifest({ ...manifest, summaryData: summaries });
+          return;
+        }
         // Fetch the static snapshot generated by the update script
         const response = await fetch('./data.json');
         if (response.ok) {
-          const data = await response.json();
+          const data = toRows(await response.json());
           setAllData(data);
         } else {
           console.error("Failed to load data.json", response.statusText);
@@ -39,6 +91,33 @@ function App() {
     loadData();
   }, []);
 
+  // 1b. Load the shards the active tab needs (sharded snapshot only)
+  useEffect(() => {
+    if (!manifest) return;
+    let cancelled = false;
+
+    async function loadShards() {
+      try {
+        setLoading(true);
+        const entries = shardsForTab(manifest, activeTab);
+        const shards = await Promise.all(entries.map(entry => loadShard(shardCache.current, entry)));
+        if (cancelled) return;
+        const since = tabCutoffSeconds(activeTab);
+        const seen = new Set();
+        const merged = shards
+          .flatMap(shard => toRows(shard, since).articles)
+          .filter(a => !seen.has(a.id) && seen.add(a.id))
+          .sort((a, b) => (a.published < b.published ? 1 : a.published > b.published ? -1 : b.id - a.id));
+        setAllData({ tab: activeTab, articles: merged, summaries: manifest.summaryData });
+      } catch (error) {
+        console.error("Error loading snapshot shards:", error);
+        setLoading(false);
+      }
+    }
+    loadShards();
+    return () => { cancelled = true; };
+  }, [manifest, activeTab]);
+
   // 2. Reset on tab change
   useEffect(() => {
     setArticles([]);
@@ -51,6 +130,8 @@ function App() {
   // 3. Filtering and Pagination (Client-side)
   useEffect(() => {
     if (!allData) return;
+    // Shards for a previous tab are still in state until the new ones arrive
+    if (allData.tab && allData.tab !== activeTab) return;
 
     function filterAndPaginate() {
       // Don't fetch if no more articles and not first page
@@ -60,22 +141,16 @@ function App() {
       if (isFirstPage) setLoading(true);
       else setIsFetchingMore(true);
 
-      const TIMEFRAME_DAYS = {
-        '1d': 1,
-        '7d': 7,
-        '30d': 30,
-        '1y': 365
-      };
-
       const days = TIMEFRAME_DAYS[activeTab];
       const limit = 20;
       const offset = (page - 1) * limit;
 
-      // Filter by timeframe
+      // Filter by timeframe; shards were already cut to the tab's window
+      // while decoding, only the monolithic data.json holds every article
       const cutoff = new Date();
       cutoff.setDate(cutoff.getDate() - days);
 
-      const filteredArticles = allData.articles.filter(article => {
+      const filteredArticles = allData.tab ? allData.articles : allData.articles.filter(article => {
         const pubDate = new Date(article.published);
         return pubDate > cutoff;
       });
@@ -83,9 +158,7 @@ function App() {
       // Slice for pagination
       const pagedArticles = filteredArticles.slice(offset, offset + limit);
 
-      if (pagedArticles.length < limit || offset + limit >= filteredArticles.length) {
-        setHasMore(false);
-      }
+      setHasMore(pagedArticles.length === limit && offset + limit < filteredArticles.length);
 
       setArticles(prev => {
         if (isFirstPage) return pagedArticles;
@@ -116,6 +189,48 @@ function App() {
     filterAndPaginate();
   }, [allData, activeTab, page]);
 
+  // 4. Keyword search: prebuilt index for sharded snapshots, otherwise a
+  // scan of the monolithic data
+  useEffect(() => {
+    if (!searchTerms(searchQuery).length) {
+      setSearchResults(null);
+      return;
+    }
+    let cancelled = false;
+
+    const timer = setTimeout(async () => {
+      try {
+        let results;
+        if (manifest?.search) {
+          const index = await loadShard(shardCache.current, manifest.search);
+          const hits = searchSnapshot(index, searchQuery);
+          const months = [...new Set(hits.map(hit => hit.month))];
+          const shards = await Promise.all(months.map(month => loadShard(shardCache.current, manifest.months[month])));
+          const byId = new Map(shards.flatMap(shard => toRows(shard).articles).map(a => [a.id, a]));
+          results = hits.map(hit => byId.get(hit.id)).filter(Boolean);
+        } else if (allData) {
+          const terms = searchTerms(searchQuery);
+          results = allData.articles
+            .filter(a => {
+              const text = `${a.title} ${a.summary || ''}`.toLowerCase();
+              return terms.every(term => text.includes(term));
+            })
+            .slice(0, 50);
+        } else {
+          return;
+        }
+        if (!cancelled) setSearchResults(results);
+      } catch (error) {
+        console.error("Search failed:", error);
+      }
+    }, 200);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery, manifest, allData]);
+
   const loadMore = () => {
     if (!loading && !isFetchingMore && hasMore) {
       setPage(prev => prev + 1);
@@ -142,10 +257,18 @@ function App() {
         {/* Navigation */}
         <TimeframeSelector activeTab={activeTab} onTabChange={setActiveTab} />
 
+        <input
+          type="search"
+          value={searchQuery}
+          onChange={e => setSearchQuery(e.target.value)}
+          placeholder="Search articles…"
+          className="w-full mb-10 px-4 py-2 rounded-lg border border-gray-200 bg-white font-sans text-sm focus:outline-none focus:border-black"
+        />
+
         {/* Content */}
         <main>
           {/* Trend Chips (Interactive) */}
-          {trendSummary && trendSummary.parsed && (
+          {!searchResults && trendSummary && trendSummary.parsed && (
             <div className="mb-12">
               <div className="flex items-center gap-2 mb-4">
                 <span className="text-xs font-bold text-openai uppercase tracking-widest">Trend Analysis</span>
@@ -183,14 +306,14 @@ function App() {
 
           <div className="mb-8">
             <h2 className="text-sm font-sans font-bold text-gray-400 uppercase tracking-widest mb-6">
-              Latest Articles
+              {searchResults ? `Search Results (${searchResults.length})` : 'Latest Articles'}
             </h2>
             <ArticleStream
-              articles={articles}
-              loading={loading}
-              selectedTrend={selectedTrend}
+              articles={searchResults ?? articles}
+              loading={loading && !searchResults}
+              selectedTrend={searchResults ? null : selectedTrend}
               loadMore={loadMore}
-              hasMore={hasMore}
+              hasMore={searchResults ? false : hasMore}
             />
           </div>
         </main>
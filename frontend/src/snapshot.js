@@ -0,0 +1,84 @@
+// Decoding for the columnar snapshot layout written by
+// `scripts/generate_static_data.py --columnar`.
+export const COLUMNAR_FORMAT = 'columnar-v1';
+
+function formatTimestamp(seconds) {
+  // Same "YYYY-MM-DD HH:MM:SS" (UTC) text the row format carries
+  return new Date(seconds * 1000).toISOString().slice(0, 19).replace('T', ' ');
+}
+
+// Rebuild article objects, optionally keeping only those published after
+// `sinceSeconds`. The date filter runs on a typed array before any object
+// is materialised.
+export function decodeColumnar({ columns, dicts, count }, sinceSeconds = null) {
+  const published = Float64Array.from(columns.published, value => value ?? NaN);
+  const articles = [];
+  for (let i = 0; i < count; i++) {
+    if (sinceSeconds !== null && !(published[i] > sinceSeconds)) continue;
+    articles.push({
+      id: columns.id[i],
+      title: columns.title[i],
+      url: columns.url[i],
+      source: dicts.source[columns.source[i]],
+      published: Number.isNaN(published[i]) ? null : formatTimestamp(published[i]),
+      type: dicts.type[columns.type[i]],
+      summary: columns.summary[i],
+    });
+  }
+  return articles;
+}
+
+function epochSeconds(timestamp) {
+  return timestamp ? Date.parse(`${timestamp.replace(' ', 'T')}Z`) / 1000 : NaN;
+}
+
+// Normalise either snapshot layout to `{ articles, ... }`, optionally keeping
+// only articles published after `sinceSeconds`
+export function toRows(data, sinceSeconds = null) {
+  if (data.format !== COLUMNAR_FORMAT) {
+    if (sinceSeconds === null || !data.articles) return data;
+    return { ...data, articles: data.articles.filter(a => epochSeconds(a.published) > sinceSeconds) };
+  }
+  const { columns, dicts, count, format, ...rest } = data;
+  return { ...rest, articles: decodeColumnar({ columns, dicts, count }, sinceSeconds) };
+}
+
+export const SEARCH_FORMAT = 'search-v1';
+
+export function searchTerms(text) {
+  return (text.toLowerCase().match(/[a-z0-9]+/g) || []).filter(term => term.length > 1);
+}
+
+function decodePostings(deltas) {
+  const positions = new Int32Array(deltas.length);
+  let position = 0;
+  deltas.forEach((delta, i) => { position += delta; positions[i] = position; });
+  return positions;
+}
+
+// Documents matching every query term (the last one as a prefix), newest
+// first, as `{ id, month }` so callers know which month shards to load.
+export function searchSnapshot(index, query, limit = 50) {
+  const terms = searchTerms(query);
+  if (!terms.length) return [];
+  const last = terms.pop();
+  const lists = terms.map(term => index.terms[term] ? decodePostings(index.terms[term]) : new Int32Array(0));
+
+  const prefixMatches = new Set();
+  for (const term of Object.keys(index.terms)) {
+    if (term.startsWith(last)) decodePostings(index.terms[term]).forEach(p => prefixMatches.add(p));
+  }
+  lists.push(Int32Array.from([...prefixMatches]).sort());
+
+  lists.sort((a, b) => a.length - b.length);
+  const [smallest, ...rest] = lists;
+  const others = rest.map(list => new Set(list));
+  const results = [];
+  for (const position of smallest) {
+    if (others.every(set => set.has(position))) {
+      results.push({ id: index.ids[position], month: index.months[index.month[position]] });
+      if (results.length >= limit) break;
+    }
+  }
+  return results;
+}
@@ -1,35 +1,63 @@
 import sqlite3
 import json
 import os
-from datetime import datetime
+import re
+import hashlib
+import argparse
+import calendar
+import itertools
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 
 # Configuration
 DB_PATH = 'backend/data.db'
 OUTPUT_PATH = 'frontend/public/data.json'
+SHARD_DIR = 'frontend/public/data'
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
+# Rolling windows written as their own shard; 1d is filtered from 7d and 1y
+# is assembled from month shards by the frontend.
+SHARD_TIMEFRAMES = {'7d': 7, '30d': 30}
+SUMMARY_TIMEFRAMES = ['30d', '1y']
+# Shards are named <key>.<hash>.json so they can be cached forever; any other
+# snapshot file left in the shard directory is stale and gets removed
+# (including .gz/.br copies that earlier versions wrote next to shards).
+HASH_CHARS = 16
+SNAPSHOT_FILE_RE = re.compile(r'\.json(\.gz|\.br)?$')
+MANIFEST_NAME = 'manifest.json'
+
+# Rows pulled from the cursor per fetchmany() while streaming
+FETCH_CHUNK = 1000
+COMPACT = (',', ':')
+
+# Optional compact layout: one array per field, repeated strings replaced by
+# indexes into a per-field dictionary and timestamps stored as epoch seconds.
+COLUMNAR_FORMAT = 'columnar-v1'
+COLUMNS = {'id': 'id', 'title': 'title', 'url': 'url', 'source': 'source_name',
+           'published': 'published_at', 'type': 'source_type', 'summary': 'summary'}
+DICT_COLUMNS = ('source', 'type')
+
+# Prebuilt keyword index shipped with sharded snapshots: title and summary
+# terms mapped to delta-encoded positions in the (newest first) document list
+SEARCH_FORMAT = 'search-v1'
+SEARCH_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+ARTICLE_QUERY = '''SELECT id, title, url, source_name as source, published_at as published, source_type as type, summary
+                   FROM articles'''
+
+def get_db_connection(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     return conn
 
-def generate_static_data():
-    print(f"Reading from {DB_PATH}...")
-    conn = get_db_connection()
-    c = conn.cursor()
-
-    # 1. Fetch ALL articles (ordered by date)
-    # We fetch everything, frontend will filter/paginate
-    print("Fetching articles...")
-    c.execute('''SELECT id, title, url, source_name as source, published_at as published, source_type as type, summary
-                 FROM articles
-                 ORDER BY published_at DESC''')
-    articles = [dict(row) for row in c.fetchall()]
-    print(f"Found {len(articles)} articles.")
+def checkpoint(db_path=DB_PATH):
+    """Fold any WAL the writers left into *db_path*, so the file is complete on its own before it is committed."""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
 
-    # 2. Fetch Summaries 
-    print("Fetching trend summaries...")
+def fetch_summaries(c):
     summaries = {}
-    for timeframe in ['30d', '1y']:
+    for timeframe in SUMMARY_TIMEFRAMES:
         c.execute('''SELECT summary_text, article_count, generated_at
                      FROM summaries
                      WHERE timeframe = ?
@@ -42,23 +70,253 @@ def generate_static_data():
                 "article_count": row['article_count'],
                 "generated_at": row['generated_at']
             }
+    return summaries
+
+def iter_articles(c, chunk_size=FETCH_CHUNK):
+    """Yield article dicts from an executed cursor, *chunk_size* rows at a time."""
+    while True:
+        rows = c.fetchmany(chunk_size)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(row)
+
+def _dumps(value):
+    return json.dumps(value, separators=COMPACT, ensure_ascii=False).encode('utf-8')
+
+def _epoch(published):
+    """``published_at`` text (naive timestamps are UTC) as epoch seconds."""
+    try:
+        parsed = datetime.fromisoformat(published)
+    except (TypeError, ValueError):
+        return None
+    return calendar.timegm(parsed.utctimetuple())
+
+def _encode_value(name, value, dicts):
+    if name in dicts:
+        return dicts[name].setdefault(value, len(dicts[name]))
+    if name == 'published':
+        return _epoch(value)
+    return value
+
+def encode_columnar(articles):
+    """Column-oriented, dictionary-encoded form of a list of article dicts."""
+    dicts = {name: {} for name in DICT_COLUMNS}
+    columns = {name: [_encode_value(name, a[name], dicts) for a in articles] for name in COLUMNS}
+    return {"format": COLUMNAR_FORMAT, "count": len(articles),
+            "dicts": {name: list(values) for name, values in dicts.items()}, "columns": columns}
+
+def _write_columns(c, write):
+    """Stream every article column by column (one ordered query per column).
+
+    The queries share one read transaction, so a concurrent write can't
+    leave the columns with different rows. Returns ``(count, dicts)``;
+    dictionaries are small and written last.
+    """
+    dicts = {name: {} for name in DICT_COLUMNS}
+    count = 0
+    c.execute('BEGIN')
+    try:
+        for n, (name, column) in enumerate(COLUMNS.items()):
+            c.execute(f"SELECT {column} FROM articles ORDER BY published_at DESC, id DESC")
+            write((b',' if n else b'') + _dumps(name) + b':[')
+            count = 0
+            while True:
+                rows = c.fetchmany(FETCH_CHUNK)
+                if not rows:
+                    break
+                values = [_encode_value(name, row[0], dicts) for row in rows]
+                write((b',' if count else b'') + _dumps(values)[1:-1])
+                count += len(rows)
+            write(b']')
+    finally:
+        c.execute('COMMIT')
+    return count, {name: list(values) for name, values in dicts.items()}
+
+@contextmanager
+def atomic_output(path):
+    """Yield a ``write(bytes)`` callable feeding *path*.
+
+    Everything is written to a temporary file that replaces *path* only once
+    the block finishes without error, so readers never see a torn file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        try:
+            yield f.write
+        except BaseException:
+            f.close()
+            os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+def generate_static_data(db_path=DB_PATH, output_path=OUTPUT_PATH, columnar=False):
+    """Stream every article into *output_path* without holding them all in memory.
+
+    With *columnar*, articles are written in the ``COLUMNAR_FORMAT`` layout
+    instead of one object per article.
+    """
+    print(f"Reading from {db_path}...")
+    conn = get_db_connection(db_path)
+    c = conn.cursor()
 
+    # 1. Fetch Summaries (small, written ahead of the article stream)
+    print("Fetching trend summaries...")
+    summaries = fetch_summaries(c)
+
+    # 2. Stream ALL articles (ordered by date) straight into the file
+    # We export everything, frontend will filter/paginate
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    print(f"Writing to {output_path}...")
+    count = 0
+    with atomic_output(output_path) as write:
+        write(b'{"generated_at":' + _dumps(datetime.now().isoformat()) + b',"summaries":' + _dumps(summaries))
+        if columnar:
+            write(b',"format":' + _dumps(COLUMNAR_FORMAT) + b',"columns":{')
+            count, dicts = _write_columns(c, write)
+            write(b'},"dicts":' + _dumps(dicts) + b',"count":' + _dumps(count) + b'}')
+        else:
+            write(b',"articles":[')
+            c.execute(ARTICLE_QUERY + ' ORDER BY published_at DESC')
+            articles = iter_articles(c)
+            while True:
+                chunk = list(itertools.islice(articles, FETCH_CHUNK))
+                if not chunk:
+                    break
+                write((b',' if count else b'') + b','.join(_dumps(a) for a in chunk))
+                count += len(chunk)
+            write(b']}')
+    conn.close()
+
+    print(f"Done! Static data generated ({count} articles).")
+    return count
+
+def search_terms(article):
+    text = f"{article['title'] or ''} {article['summary'] or ''}".lower()
+    return {term for term in SEARCH_TOKEN_RE.findall(text) if len(term) > 1}
+
+class SearchIndexBuilder:
+    """Accumulates postings while articles stream past, newest first."""
+
+    def __init__(self):
+        self.ids = []
+        self.months = []
+        self.month_index = {}
+        self.postings = {}
+
+    def add(self, article, month):
+        position = len(self.ids)
+        self.ids.append(article['id'])
+        self.months.append(self.month_index.setdefault(month, len(self.month_index)))
+        for term in search_terms(article):
+            self.postings.setdefault(term, []).append(position)
+
+    def payload(self):
+        terms = {}
+        for term in sorted(self.postings):
+            positions = self.postings[term]
+            terms[term] = [positions[0]] + [b - a for a, b in zip(positions, positions[1:])]
+        return {"format": SEARCH_FORMAT, "ids": self.ids, "months": list(self.month_index),
+                "month": self.months, "terms": terms}
+
+def write_shard(shard_dir, key, payload):
+    """Write *payload* as ``<key>.<hash>.json``.
+
+    Returns ``(filename, written)``. The name is derived from the content, so
+    an existing file with that name is already up to date and is left alone.
+    Shards carry no timestamps, so unchanged data keeps its name across runs.
+    """
+    body = _dumps(payload)
+    filename = f"{key}.{hashlib.sha256(body).hexdigest()[:HASH_CHARS]}.json"
+    path = os.path.join(shard_dir, filename)
+    if os.path.exists(path):
+        return filename, False
+    with atomic_output(path) as write:
+        write(body)
+    return filename, True
+
+def generate_sharded_data(db_path=DB_PATH, shard_dir=SHARD_DIR, now=None, columnar=False):
+    """Write content-hashed per-timeframe and per-month shards plus ``manifest.json``.
+
+    Only shards whose contents changed are written; files no longer referenced
+    by the manifest are removed. ``manifest.json`` is the only file with a
+    fixed name. With *columnar*, article shards use ``COLUMNAR_FORMAT``.
+    Returns the manifest.
+    """
+    now = now or datetime.now()
+    print(f"Reading from {db_path}...")
+    conn = get_db_connection(db_path)
+    c = conn.cursor()
+    summaries = fetch_summaries(c)
+
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest = {"generated_at": now.isoformat(), "format": COLUMNAR_FORMAT if columnar else "rows",
+                "timeframes": {}, "months": {}}
+    encode = encode_columnar if columnar else (lambda articles: {"articles": articles})
+    written = 0
+
+    def add(section, key, payload, count=None):
+        nonlocal written
+        filename, changed = write_shard(shard_dir, key, payload)
+        written += changed
+        entry = {"file": filename}
+        if count is not None:
+            entry["count"] = count
+        if section is None:
+            manifest[key] = entry
+        else:
+            manifest[section][key] = entry
+
+    # 1. Stream articles newest first; each month is written as soon as the
+    # cursor moves past it, so only one month is held in memory at a time.
+    cutoffs = {timeframe: (now - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+               for timeframe, days in SHARD_TIMEFRAMES.items()}
+    oldest_cutoff = min(cutoffs.values())
+    recent = []
+    search = SearchIndexBuilder()
+    c.execute(ARTICLE_QUERY + ' ORDER BY published_at DESC, id DESC')
+    for month, group in itertools.groupby(iter_articles(c), key=lambda a: a['published'][:7]):
+        articles = list(group)
+        recent.extend(a for a in articles if a['published'] > oldest_cutoff)
+        for article in articles:
+            search.add(article, month)
+        add("months", month, encode(articles), len(articles))
     conn.close()
+    manifest["months"] = dict(sorted(manifest["months"].items()))
+    print(f"Found {sum(m['count'] for m in manifest['months'].values())} articles "
+          f"in {len(manifest['months'])} months.")
+
+    # 2. Rolling timeframe windows and summaries
+    for timeframe, cutoff in cutoffs.items():
+        articles = [a for a in recent if a['published'] > cutoff]
+        add("timeframes", timeframe, encode(articles), len(articles))
+    add(None, "summaries", summaries)
+    add(None, "search", search.payload())
+
+    entries = [*manifest["timeframes"].values(), *manifest["months"].values(),
+               manifest["summaries"], manifest["search"]]
+    live = {entry["file"] for entry in entries}
+    for filename in os.listdir(shard_dir):
+        if SNAPSHOT_FILE_RE.search(filename) and filename != MANIFEST_NAME and filename not in live:
+            os.remove(os.path.join(shard_dir, filename))
+
+    with atomic_output(os.path.join(shard_dir, MANIFEST_NAME)) as write:
+        write(json.dumps(manifest, indent=2).encode('utf-8'))
 
-    # 3. Construct Data Object
-    data = {
-        "generated_at": datetime.now().isoformat(),
-        "articles": articles,
-        "summaries": summaries
-    }
-
-    # 4. Write to JSON
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    print(f"Writing to {OUTPUT_PATH}...")
-    with open(OUTPUT_PATH, 'w') as f:
-        json.dump(data, f, indent=2)
-    
-    print("Done! Static data generated.")
+    total = len(entries)
+    print(f"Done! {written} of {total} shards rewritten in {shard_dir}.")
+    return manifest
 
 if __name__ == "__main__":
-    generate_static_data()
+    parser = argparse.ArgumentParser(description="Export the SQLite DB as a static snapshot for the frontend.")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database to read")
+    parser.add_argument('--sharded', action='store_true',
+                        help=f"Write per-timeframe/per-month shards and a manifest to {SHARD_DIR}")
+    parser.add_argument('--columnar', action='store_true',
+                        help="Write articles as dictionary-encoded columns instead of one object per article")
+    args = parser.parse_args()
+    if args.sharded:
+        generate_sharded_data(args.db, columnar=args.columnar)
+    else:
+        generate_static_data(args.db, columnar=args.columnar)
+    checkpoint(args.db)
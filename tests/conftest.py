@@ -0,0 +1,11 @@
+import pytest
+from backend.api import clear_cache
+from backend.database import close_all
+
+@pytest.fixture(autouse=True)
+def reset_shared_state():
+    # Tests delete and recreate their DB files under the same names; don't let
+    # pooled connections or cached API responses outlive them
+    yield
+    close_all()
+    clear_cache()
@@ -1,7 +1,10 @@
 from fastapi.testclient import TestClient
 from backend.api import app, DB_PATH
+from backend.database import close_all
+import asyncio
 import sqlite3
 import os
+import time
 import pytest
 
 client = TestClient(app)
@@ -32,7 +35,9 @@ def mock_db():
     conn.close()
     
     yield TEST_DB
-    
+
+    # Pooled API connections keep the WAL open; close them before deleting
+    close_all()
     if os.path.exists(TEST_DB):
         os.remove(TEST_DB)
 
@@ -56,3 +61,135 @@ def test_invalid_timeframe(mock_db):
     with patch('backend.api.DB_PATH', TEST_DB):
         response = client.get("/articles/invalid")
         assert response.status_code == 400
+
+def test_connections_are_pooled_per_thread(mock_db):
+    from backend.database import get_connection
+    conn = get_connection(TEST_DB)
+    assert get_connection(TEST_DB) is conn
+
+    # close_all() invalidates every thread's pool
+    close_all()
+    assert get_connection(TEST_DB) is not conn
+
+def test_cursor_pagination(mock_db):
+    conn = sqlite3.connect(TEST_DB)
+    for i in range(4):
+        conn.execute("INSERT INTO articles (url, title, published_at, source_name) "
+                     "VALUES (?, ?, datetime('now', ?), 'API Source')", (f'http://test.com/{i}', f'Older {i}', f'-{i + 1} hours'))
+    # Same timestamp as another row: the id breaks the tie
+    conn.execute("INSERT INTO articles (url, title, published_at, source_name) "
+                 "SELECT 'http://test.com/tie', 'Tie', published_at, 'API Source' FROM articles WHERE url = 'http://test.com/1'")
+    conn.commit()
+    conn.close()
+
+    with patch('backend.api.DB_PATH', TEST_DB):
+        offset_titles = [a['title'] for page in (1, 2, 3)
+                         for a in client.get(f"/articles/7d?limit=2&page={page}").json()]
+
+        titles = []
+        response = client.get("/articles/7d?limit=2")
+        while True:
+            titles += [a['title'] for a in response.json()]
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            response = client.get(f"/articles/7d?limit=2&cursor={cursor}")
+
+    assert len(titles) == 6
+    assert titles == offset_titles
+
+def test_invalid_cursor(mock_db):
+    with patch('backend.api.DB_PATH', TEST_DB):
+        assert client.get("/articles/7d?cursor=not-a-cursor").status_code == 400
+
+def test_etag_and_not_modified(mock_db):
+    with patch('backend.api.DB_PATH', TEST_DB):
+        response = client.get("/summaries/7d")
+        etag = response.headers['ETag']
+        assert client.get("/summaries/7d", headers={'If-None-Match': etag}).status_code == 304
+        assert client.get("/summaries/7d", headers={'If-None-Match': '"other"'}).status_code == 200
+
+def test_cache_invalidated_by_generation(mock_db):
+    from backend.database import init_db, bump_generation
+    init_db(TEST_DB)
+
+    def add_article(title):
+        conn = sqlite3.connect(TEST_DB)
+        conn.execute("INSERT INTO articles (url, title, published_at, source_name) "
+                     "VALUES (?, ?, datetime('now'), 'API Source')", (f'http://test.com/{title}', title))
+        return conn
+
+    with patch('backend.api.DB_PATH', TEST_DB), patch('backend.api.CACHE_TTL', 0):
+        assert len(client.get("/articles/7d").json()) == 1
+
+        # Written without bumping the generation: still served from the cache
+        conn = add_article('Unannounced')
+        conn.commit()
+        conn.close()
+        assert len(client.get("/articles/7d").json()) == 1
+
+        conn = add_article('Announced')
+        bump_generation(conn)
+        conn.commit()
+        conn.close()
+        assert len(client.get("/articles/7d").json()) == 3
+
+def test_search_before_migration(mock_db):
+    # mock_db is an old-schema file no writer has migrated yet
+    with patch('backend.api.DB_PATH', TEST_DB):
+        response = client.get("/search?q=robot")
+        assert response.status_code == 503
+        assert 'Search index not built' in response.json()['detail']
+
+def test_search(mock_db):
+    from backend.content import store_content
+    from backend.database import init_db
+    init_db(TEST_DB)  # adds the FTS table and indexes the existing article
+    conn = sqlite3.connect(TEST_DB)
+    c = conn.execute("INSERT INTO articles (url, title, published_at, source_name) "
+                     "VALUES ('http://test.com/2', 'Robotics update', datetime('now'), 'B')")
+    store_content(c, [(c.lastrowid, '<p>New API endpoints for robots: latency &lt; 5ms</p>')])
+    conn.execute("UPDATE articles SET summary = 'Covers robotic arms' WHERE title = 'Test API Article'")
+    conn.commit()
+    conn.close()
+
+    with patch('backend.api.DB_PATH', TEST_DB):
+        # Title match ranks above a summary-only match; "robot" prefix-matches
+        results = client.get("/search?q=robot").json()
+        assert [r['title'] for r in results] == ['Robotics update', 'Test API Article']
+        hit = client.get("/search?q=api endpoints").json()[0]
+        assert hit['url'] == 'http://test.com/2'
+        assert hit['snippet'] == 'New <mark>API</mark> <mark>endpoints</mark> for robots: latency &lt; 5ms'
+        assert client.get('/search?q="unbalanced AND (').status_code == 200
+        assert client.get("/search?q=%20").status_code == 400
+
+def test_reader_pool_sheds_load_and_times_out(mock_db):
+    from backend import api
+    with patch('backend.api.DB_PATH', TEST_DB):
+        with patch.object(api.reader_pool, 'max_pending', 0):
+            response = client.get("/summaries/7d")
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+
+        slow = lambda conn, timeframe: time.sleep(0.5) or ({}, {})
+        with patch.object(api.reader_pool, 'timeout', 0.05), patch('backend.api._query_summary', slow):
+            assert client.get("/summaries/7d").status_code == 504
+
+        # Nothing was cached for the failed requests
+        assert client.get("/summaries/7d").json()['summary'] == 'Test API Summary'
+
+def test_reader_pool_interrupts_slow_query(mock_db):
+    from backend.readers import ReaderPool
+    pool = ReaderPool(threads=1, timeout=0.2)
+    endless = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n"
+
+    async def scenario():
+        with pytest.raises(TimeoutError):
+            await pool.run(TEST_DB, lambda conn: conn.execute(endless).fetchone())
+        # The only reader thread is free again
+        return await pool.run(TEST_DB, lambda conn: conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0])
+
+    started = time.monotonic()
+    assert asyncio.run(scenario()) == 1
+    assert time.monotonic() - started < 2
+    pool.shutdown()
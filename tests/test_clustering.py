@@ -0,0 +1,82 @@
+import json
+import os
+import sqlite3
+import unittest
+from unittest.mock import patch
+from backend.clustering import cluster_documents, tfidf_matrix
+from backend.summarizer import generate_summary
+
+TEST_DB = 'test_clustering.db'
+
+TITLES = [
+    'GPU cluster doubles training throughput',
+    'New GPU accelerates model training',
+    'Training throughput on the new GPU cluster',
+    'Robotics lab shows humanoid robot walking',
+    'Humanoid robot learns to walk with robotics policy',
+    'Robotics policy for humanoid robot hands',
+]
+
+class TestClustering(unittest.TestCase):
+
+    def test_tfidf_rows_are_unit_length(self):
+        matrix, vocabulary = tfidf_matrix(TITLES)
+        self.assertEqual(matrix.shape, (6, len(vocabulary)))
+        for row in matrix:
+            self.assertAlmostEqual(float((row ** 2).sum()), 1.0, places=5)
+        self.assertNotIn('the', vocabulary)
+
+    def test_groups_articles_by_topic(self):
+        clusters = cluster_documents(TITLES, k=2)
+        groups = sorted(sorted(c['members']) for c in clusters)
+        self.assertEqual(groups, [[0, 1, 2], [3, 4, 5]])
+        terms = {t for c in clusters for t in c['terms']}
+        self.assertIn('gpu', terms)
+        self.assertIn('robot', terms)
+
+    def test_is_deterministic(self):
+        self.assertEqual(cluster_documents(TITLES), cluster_documents(TITLES))
+
+    def test_empty_input(self):
+        self.assertEqual(cluster_documents([]), [])
+
+
+class TestClusterTrends(unittest.TestCase):
+
+    def setUp(self):
+        conn = sqlite3.connect(TEST_DB)
+        conn.execute('''CREATE TABLE articles
+                        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                         url TEXT UNIQUE NOT NULL,
+                         title TEXT NOT NULL,
+                         content TEXT,
+                         published_at TIMESTAMP NOT NULL,
+                         source_type TEXT,
+                         source_name TEXT,
+                         summary TEXT,
+                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+        for i, title in enumerate(TITLES):
+            conn.execute("INSERT INTO articles (url, title, published_at, source_name) VALUES (?, ?, datetime('now'), 'S')",
+                         (f'https://example.com/{i}', title))
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        if os.path.exists(TEST_DB):
+            os.remove(TEST_DB)
+
+    @patch('backend.summarizer.ollama.chat')
+    def test_llm_only_names_precomputed_clusters(self, mock_chat):
+        mock_chat.return_value = {'message': {'content': json.dumps({'name': 'Topic', 'summary': 'About it.'})}}
+
+        summary = json.loads(generate_summary(30, db_path=TEST_DB, trend_method='cluster'))
+
+        ids = sorted(i for trend in summary['trends'] for i in trend['article_ids'])
+        self.assertEqual(ids, [1, 2, 3, 4, 5, 6])
+        self.assertEqual(mock_chat.call_count, len(summary['trends']))
+        self.assertTrue(all(t['name'] == 'Topic' for t in summary['trends']))
+        prompt = mock_chat.call_args.kwargs['messages'][0]['content']
+        self.assertIn('key terms', prompt)
+
+if __name__ == '__main__':
+    unittest.main()
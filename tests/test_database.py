@@ -1,7 +1,7 @@
 import os
 import sqlite3
 import pytest
-from backend.database import init_db, get_db_connection
+from backend.database import init_db, get_db_connection, get_connection, close_all
 
 # Use a temporary file for testing
 TEST_DB = 'test_data.db'
@@ -32,9 +32,9 @@ def test_insert_article(db_path):
     conn = get_db_connection(db_path)
     cursor = conn.cursor()
     
-    cursor.execute('''INSERT INTO articles (url, title, content, published_at, source_type, source_name)
-                      VALUES (?, ?, ?, ?, ?, ?)''',
-                   ('http://example.com', 'Test Title', 'Content', '2023-01-01 12:00:00', 'blog', 'Test Source'))
+    cursor.execute('''INSERT INTO articles (url, title, published_at, source_type, source_name)
+                      VALUES (?, ?, ?, ?, ?)''',
+                   ('http://example.com', 'Test Title', '2023-01-01 12:00:00', 'blog', 'Test Source'))
     conn.commit()
     
     cursor.execute('SELECT * FROM articles WHERE url = ?', ('http://example.com',))
@@ -42,3 +42,24 @@ def test_insert_article(db_path):
     assert article['title'] == 'Test Title'
     
     conn.close()
+
+def test_only_init_db_switches_to_wal(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+    conn.commit()
+    conn.close()
+    original = open(db_path, 'rb').read()
+
+    # Readers leave a checked-out file (header, sidecars) exactly as it was
+    reader = get_connection(db_path)
+    assert reader.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    assert reader.execute('SELECT COUNT(*) FROM notes').fetchone()[0] == 0
+    assert open(db_path, 'rb').read() == original
+    assert not os.path.exists(db_path + '-wal')
+
+    close_all()
+
+    init_db(db_path)
+    conn = get_db_connection(db_path)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    conn.close()
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import pytest
+from backend.database import init_db
+from backend.ingest import ingest_articles, existing_urls
+
+TEST_DB = 'test_ingest.db'
+
+@pytest.fixture
+def conn():
+    init_db(TEST_DB)
+    conn = sqlite3.connect(TEST_DB)
+    yield conn
+    conn.close()
+    if os.path.exists(TEST_DB):
+        os.remove(TEST_DB)
+
+def make_row(url, title='Title'):
+    return (url, title, 'content', '2024-01-01 00:00:00', 'blog', 'Source')
+
+def test_ingest_counts_new_and_duplicates(conn):
+    new, dup = ingest_articles(conn, [make_row('https://a.com/1'), make_row('https://a.com/2')])
+    assert (new, dup) == (2, 0)
+
+    # One already stored, one repeated within the batch, one new
+    rows = [make_row('https://a.com/2'), make_row('https://a.com/3'), make_row('https://a.com/3')]
+    new, dup = ingest_articles(conn, rows)
+    assert (new, dup) == (1, 2)
+
+    count = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    assert count == 3
+
+def test_ingest_empty_batch(conn):
+    assert ingest_articles(conn, []) == (0, 0)
+
+def test_existing_urls_spans_chunks(conn):
+    rows = [make_row(f'https://a.com/{i}') for i in range(1200)]
+    ingest_articles(conn, rows)
+    lookup = [f'https://a.com/{i}' for i in range(1100, 1300)]
+    found = existing_urls(conn.cursor(), lookup)
+    assert found == {f'https://a.com/{i}' for i in range(1100, 1200)}
+
+STORY = ('OpenAI and Microsoft announce a new multi-year partnership to build supercomputing '
+         'infrastructure for training frontier models in Azure datacenters. The agreement covers '
+         'dedicated clusters of accelerators, new networking fabric and power contracts across several '
+         'regions, and both companies say the first systems will come online next year to support '
+         'research on reasoning, safety evaluations and large scale deployment of assistants.')
+
+def test_near_duplicate_becomes_alias(conn):
+    original = ('https://a.com/story', 'Partnership news', STORY, '2024-01-01 00:00:00', 'blog', 'A')
+    repost = ('https://b.com/repost?utm_source=feed', 'Partnership news', STORY + ' Read more on our blog.',
+              '2024-01-01 01:00:00', 'blog', 'B')
+    assert ingest_articles(conn, [original]) == (1, 0)
+    assert ingest_articles(conn, [repost]) == (0, 1)
+
+    assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 1
+    alias = conn.execute("SELECT url, canonical_id FROM article_aliases").fetchone()
+    canonical_id = conn.execute("SELECT id FROM articles WHERE url = ?", (original[0],)).fetchone()[0]
+    # Aliases are stored under the canonical URL, tracking parameters dropped
+    assert alias == ('https://b.com/repost', canonical_id)
+
+    # The alias URL is known from now on
+    assert ingest_articles(conn, [repost]) == (0, 1)
+
+def test_near_duplicates_within_one_batch(conn):
+    rows = [
+        ('https://a.com/1', 'Partnership news', STORY, '2024-01-01', 'blog', 'A'),
+        ('https://b.com/1', 'Partnership news!', STORY, '2024-01-01', 'blog', 'B'),
+        ('https://c.com/1', 'Unrelated', 'A completely different story about robotics labs '
+                                         'shipping humanoid hands for warehouse work', '2024-01-01', 'blog', 'C'),
+    ]
+    assert ingest_articles(conn, rows) == (2, 1)
+    urls = {row[0] for row in conn.execute("SELECT url FROM articles")}
+    assert urls == {'https://a.com/1', 'https://c.com/1'}
+    assert conn.execute("SELECT COUNT(*) FROM article_aliases").fetchone()[0] == 1
+
+def test_url_variants_share_one_row(conn):
+    rows = [make_row('https://A.com/post/'), make_row('https://a.com/post?utm_source=rss#top')]
+    assert ingest_articles(conn, rows) == (1, 1)
+    assert conn.execute("SELECT url FROM articles").fetchall() == [('https://a.com/post',)]
+    assert ingest_articles(conn, [make_row('https://a.com:443/post')]) == (0, 1)
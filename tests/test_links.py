@@ -10,14 +10,30 @@ from backend.scraper import is_valid_url, scrape_blogs
 
 VALID_URL_RE = re.compile(r'^https?://\S+')
 
-DATA_JSON_PATH = os.path.join(
+SHARD_DIR = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-    'frontend', 'public', 'data.json',
+    'frontend', 'public', 'data',
 )
+MANIFEST_PATH = os.path.join(SHARD_DIR, 'manifest.json')
 
 TEST_DB = 'test_links.db'
 
 
+def read_shard(entry):
+    with open(os.path.join(SHARD_DIR, entry['file'])) as f:
+        return json.load(f)
+
+
+def read_articles(entry):
+    """Articles of one shard as ``{id, title, url}`` dicts, in either shard layout."""
+    data = read_shard(entry)
+    if 'columns' not in data:
+        return data['articles']
+    columns = data['columns']
+    return [{'id': columns['id'][i], 'title': columns['title'][i], 'url': columns['url'][i]}
+            for i in range(data['count'])]
+
+
 class TestUrlValidationHelper(unittest.TestCase):
     """Unit tests for the is_valid_url helper in scraper.py."""
 
@@ -125,44 +141,57 @@ class TestScraperRejectsInvalidUrls(unittest.TestCase):
         self.assertEqual(count, 0, "Articles with empty URLs should not be stored")
 
 
-class TestDataJsonLinks(unittest.TestCase):
-    """Integration-style tests against the committed frontend/public/data.json snapshot."""
+class TestSnapshotLinks(unittest.TestCase):
+    """Integration-style tests against the sharded snapshot in frontend/public/data/."""
 
     @classmethod
     def setUpClass(cls):
-        if os.path.exists(DATA_JSON_PATH):
-            with open(DATA_JSON_PATH) as f:
-                cls.data = json.load(f)
-        else:
-            cls.data = None
+        cls.manifest = None
+        if not os.path.exists(MANIFEST_PATH):
+            return
+        with open(MANIFEST_PATH) as f:
+            cls.manifest = json.load(f)
+        cls.months = {month: read_articles(entry) for month, entry in cls.manifest['months'].items()}
+        cls.timeframes = {tf: read_articles(entry) for tf, entry in cls.manifest['timeframes'].items()}
+        cls.articles = [a for articles in cls.months.values() for a in articles]
+        cls.summaries = read_shard(cls.manifest['summaries'])
 
     def _skip_if_no_data(self):
-        if self.data is None:
-            self.skipTest('frontend/public/data.json not found')
+        if self.manifest is None:
+            self.skipTest('frontend/public/data/manifest.json not found')
 
     def test_all_articles_have_valid_urls(self):
-        """Every article in data.json must have a non-empty absolute URL."""
+        """Every article in every shard must have a non-empty absolute URL."""
         self._skip_if_no_data()
-        for article in self.data['articles']:
-            url = article.get('url', '')
-            self.assertTrue(url, f"Article '{article.get('title')}' has empty URL")
-            self.assertRegex(
-                url, VALID_URL_RE,
-                f"Article '{article.get('title')}' has invalid URL: {url!r}",
-            )
+        for shard in [*self.months.values(), *self.timeframes.values()]:
+            for article in shard:
+                url = article.get('url', '')
+                self.assertTrue(url, f"Article '{article.get('title')}' has empty URL")
+                self.assertRegex(
+                    url, VALID_URL_RE,
+                    f"Article '{article.get('title')}' has invalid URL: {url!r}",
+                )
 
     def test_no_duplicate_article_urls(self):
-        """No two articles in data.json may share the same URL."""
+        """No two articles across the month shards may share the same URL."""
         self._skip_if_no_data()
-        urls = [a['url'] for a in self.data['articles']]
+        urls = [a['url'] for a in self.articles]
         duplicates = len(urls) - len(set(urls))
         self.assertEqual(duplicates, 0, f"Found {duplicates} duplicate article URLs")
 
+    def test_timeframe_shards_only_hold_archived_articles(self):
+        """The rolling 7d/30d shards are views of articles that also sit in a month shard."""
+        self._skip_if_no_data()
+        ids = {a['id'] for a in self.articles}
+        for timeframe, shard in self.timeframes.items():
+            missing = [a['id'] for a in shard if a['id'] not in ids]
+            self.assertEqual(missing, [], f"{timeframe} shard has articles missing from the month shards")
+
     def test_trend_article_ids_reference_real_articles(self):
         """article_ids in every trend summary must correspond to real article IDs."""
         self._skip_if_no_data()
-        real_ids = {a['id'] for a in self.data['articles']}
-        for timeframe, summary in self.data.get('summaries', {}).items():
+        real_ids = {a['id'] for a in self.articles}
+        for timeframe, summary in self.summaries.items():
             if not summary or not summary.get('summary'):
                 continue
             try:
@@ -178,9 +207,9 @@ class TestDataJsonLinks(unittest.TestCase):
                     )
 
     def test_articles_list_is_non_empty(self):
-        """data.json must contain at least one article."""
+        """The month shards must contain at least one article."""
         self._skip_if_no_data()
-        self.assertGreater(len(self.data['articles']), 0, "data.json articles list is empty")
+        self.assertGreater(len(self.articles), 0, "snapshot has no articles")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from backend import maintenance
+from backend.content import load_content
+from backend.database import init_db
+from backend.ingest import ingest_articles
+
+TEST_DB = 'test_maintenance.db'
+ARCHIVE_DIR = 'test_maintenance_archive'
+BODY = ' '.join(['Benchmarks for long-context retrieval with sparse attention kernels.'] * 20)
+
+def days_ago(days):
+    return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+@pytest.fixture
+def db():
+    init_db(TEST_DB)
+    conn = sqlite3.connect(TEST_DB)
+    ingest_articles(conn, [
+        ('https://a.com/new', 'New', BODY, days_ago(1), 'blog', 'A'),
+        ('https://a.com/warm', 'Warm', BODY, days_ago(200), 'blog', 'A'),
+        ('https://a.com/old', 'Old', BODY, '2020-05-04 10:00:00', 'blog', 'A'),
+        ('https://a.com/older', 'Older', 'Short body', '2020-05-01 10:00:00', 'blog', 'B'),
+    ])
+    conn.executemany("INSERT INTO summaries (timeframe, summary_text, generated_at) VALUES (?, ?, ?)",
+                     [('1d', f'Summary {i}', f'2024-01-0{i} 00:00:00') for i in range(1, 6)] +
+                     [('7d', 'Only one', '2024-01-01 00:00:00')])
+    conn.commit()
+    conn.close()
+    yield TEST_DB
+    os.remove(TEST_DB)
+    shutil.rmtree(ARCHIVE_DIR, ignore_errors=True)
+
+def read_archive(month):
+    with gzip.open(os.path.join(ARCHIVE_DIR, f'{month}.jsonl.gz'), 'rt') as f:
+        return [json.loads(line) for line in f]
+
+def test_archives_old_bodies_and_compacts(db):
+    report = maintenance.run_maintenance(db, ARCHIVE_DIR, days=365, keep_summaries=2)
+
+    assert report['archived'] == 2
+    assert report['archive_months'] == ['2020-05']
+    assert report['compressed'] == 0  # the warm body is inside the search horizon
+    assert report['summaries_pruned'] == 3
+    assert report['bytes_after'] == os.path.getsize(db)
+
+    records = read_archive('2020-05')
+    assert [(r['title'], r['content']) for r in records] == [('Old', BODY), ('Older', 'Short body')]
+
+    conn = sqlite3.connect(db)
+    # Rows stay listed; only the old bodies left the live DB
+    assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 4
+    assert [load_content(conn, i) for i in (1, 2, 3, 4)] == [BODY, BODY, None, None]
+    assert conn.execute("SELECT timeframe, summary_text FROM summaries ORDER BY id").fetchall() == [
+        ('1d', 'Summary 4'), ('1d', 'Summary 5'), ('7d', 'Only one')]
+    assert conn.execute("SELECT article_id FROM article_content WHERE compressed = 0").fetchall() == [(1,), (2,)]
+    assert [row[0] for row in conn.execute(
+        "SELECT rowid FROM articles_fts WHERE articles_fts MATCH 'sparse' ORDER BY rowid")] == [1, 2]
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('integrity-check')")
+    conn.close()
+
+def test_archive_dir_exists_before_anything_is_archived(db):
+    # The scheduled workflow stages the directory on every run
+    assert maintenance.run_maintenance(db, ARCHIVE_DIR, days=100000)['archived'] == 0
+    assert os.listdir(ARCHIVE_DIR) == []
+
+def test_rerun_merges_into_existing_archive(db):
+    maintenance.run_maintenance(db, ARCHIVE_DIR, days=365)
+    first = open(os.path.join(ARCHIVE_DIR, '2020-05.jsonl.gz'), 'rb').read()
+    assert maintenance.run_maintenance(db, ARCHIVE_DIR, days=365)['archived'] == 0
+    assert open(os.path.join(ARCHIVE_DIR, '2020-05.jsonl.gz'), 'rb').read() == first
+
+    # A shorter horizon later adds the warm article to its own month
+    report = maintenance.run_maintenance(db, ARCHIVE_DIR, days=100)
+    assert report['archived'] == 1
+    month = days_ago(200)[:7]
+    assert [r['content'] for r in read_archive(month)] == [BODY]
+    assert len(read_archive('2020-05')) == 2
@@ -0,0 +1,148 @@
+import json
+import os
+import sqlite3
+import pytest
+from backend import content
+from backend.database import init_db
+from backend.migrations import SCHEMA_VERSION, migrate, schema_version
+
+TEST_DB = 'test_migrations.db'
+BODY = ' '.join(['Robots learn to fold laundry with a new grasping policy.'] * 10)
+
+@pytest.fixture
+def legacy_db():
+    # Schema as created before migrations existed: bodies inline in articles
+    conn = sqlite3.connect(TEST_DB)
+    conn.execute('''CREATE TABLE articles
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     url TEXT UNIQUE NOT NULL,
+                     title TEXT NOT NULL,
+                     content TEXT,
+                     published_at TIMESTAMP NOT NULL,
+                     source_type TEXT,
+                     source_name TEXT,
+                     summary TEXT,
+                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.executemany("INSERT INTO articles (url, title, content, published_at, source_name) VALUES (?, ?, ?, ?, 'A')",
+                     [('https://a.com/new', 'Fresh news', BODY, '2999-01-01 00:00:00'),
+                      ('https://a.com/old', 'Old news', BODY, '2001-01-01 00:00:00'),
+                      ('https://a.com/empty', 'No body', '', '2999-01-01 00:00:00')])
+    conn.commit()
+    conn.close()
+    yield TEST_DB
+    os.remove(TEST_DB)
+
+def search(conn, query):
+    return [row[0] for row in conn.execute(
+        "SELECT rowid FROM articles_fts WHERE articles_fts MATCH ? ORDER BY rowid", (query,))]
+
+def check_index(conn):
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('integrity-check')")
+
+def test_moves_bodies_out_of_articles(legacy_db):
+    init_db(legacy_db)
+    conn = sqlite3.connect(legacy_db)
+    assert schema_version(conn) == SCHEMA_VERSION
+    assert 'content' not in {row[1] for row in conn.execute('PRAGMA table_info(articles)')}
+
+    rows = dict(conn.execute("SELECT article_id, compressed FROM article_content").fetchall())
+    assert rows == {1: 0, 2: 1}  # the old body is cold and got compressed
+    assert content.load_content(conn, 1) == BODY
+    assert content.load_content(conn, 2) == BODY
+
+    # Cold bodies drop out of the search index; titles stay searchable
+    assert search(conn, 'laundry') == [1]
+    assert search(conn, 'news') == [1, 2]
+    check_index(conn)
+    conn.close()
+
+def test_bodies_stay_searchable_for_a_year(legacy_db):
+    init_db(legacy_db)
+    conn = sqlite3.connect(legacy_db)
+    c = conn.execute("INSERT INTO articles (url, title, published_at) "
+                     "VALUES ('https://b.com', 'Chips', datetime('now', '-300 days'))")
+    content.store_content(c, [(c.lastrowid, BODY)])
+    assert content.compress_cold_content(c) == 0
+    assert search(conn, 'laundry') == [1, c.lastrowid]
+    conn.close()
+
+def test_migrate_is_a_no_op_when_current(legacy_db):
+    init_db(legacy_db)
+    conn = sqlite3.connect(legacy_db)
+    assert migrate(conn) == []
+    conn.close()
+    init_db(legacy_db)
+
+def test_triggers_keep_search_in_sync(legacy_db):
+    init_db(legacy_db)
+    conn = sqlite3.connect(legacy_db)
+    c = conn.execute("INSERT INTO articles (url, title, published_at) VALUES ('https://b.com', 'Chips', '2999-01-01')")
+    article_id = c.lastrowid
+    content.store_content(c, [(article_id, 'Wafer-scale accelerators ship')])
+    assert search(conn, 'wafer') == [article_id]
+
+    content.store_content(c, [(article_id, 'Photonic interconnects ship')])
+    conn.execute("UPDATE articles SET summary = 'Optical links' WHERE id = ?", (article_id,))
+    assert search(conn, 'wafer') == []
+    assert search(conn, 'photonic AND optical') == [article_id]
+
+    conn.execute("DELETE FROM articles WHERE id IN (?, 2)", (article_id,))
+    assert search(conn, 'photonic') == []
+    assert conn.execute("SELECT article_id FROM article_content").fetchall() == [(1,)]
+    check_index(conn)
+    conn.close()
+
+HTML_BODY = ('<p><img class="wp-image-12 attachment-full" src="/wp-content/uploads/gpu.jpg"/>'
+             'Grace &amp; Hopper chips <b>ship</b> today.</p><script>track("jpg")</script>')
+
+def test_bodies_are_indexed_as_plain_text(legacy_db):
+    conn = sqlite3.connect(legacy_db)
+    conn.execute("UPDATE articles SET content = ? WHERE id = 1", (HTML_BODY,))
+    conn.commit()
+    conn.close()
+    init_db(legacy_db)
+
+    conn = sqlite3.connect(legacy_db)
+    assert content.load_content(conn, 1) == 'Grace & Hopper chips ship today.'
+    for markup in ('jpg', 'wp', 'attachment', 'script'):
+        assert search(conn, markup) == []
+    assert search(conn, 'hopper') == [1]
+
+    # Bodies written after the migration are stripped the same way
+    content.store_content(conn, [(3, HTML_BODY)])
+    assert search(conn, 'jpg') == []
+    assert search(conn, 'grace') == [1, 3]
+    check_index(conn)
+    conn.close()
+
+def test_url_variants_are_merged(legacy_db):
+    init_db(legacy_db)
+    conn = sqlite3.connect(legacy_db)
+    # Rows stored before ingest canonicalized URLs
+    conn.executemany("INSERT INTO articles (url, title, summary, published_at, source_type, source_name) "
+                     "VALUES (?, ?, ?, '2024-01-01', 'blog', 'A')",
+                     [('https://b.com/post?utm_source=rss', 'Post', None),
+                      ('https://b.com/post/', 'Post', 'A summary'),
+                      ('https://b.com/other#top', 'Other', None)])
+    trends = {'trends': [{'name': 'T', 'summary': 's', 'article_ids': [1, 4, 5, 6]}]}
+    conn.execute("INSERT INTO summaries (timeframe, summary_text, article_count) VALUES ('30d', ?, 4)",
+                 (json.dumps(trends),))
+    conn.execute("INSERT INTO summary_coverage (timeframe, article_ids) VALUES ('30d', '[4, 5, 6]')")
+    conn.execute('PRAGMA user_version = 2')
+    conn.commit()
+    conn.close()
+    init_db(legacy_db)
+
+    conn = sqlite3.connect(legacy_db)
+    assert schema_version(conn) == SCHEMA_VERSION
+    articles = conn.execute("SELECT id, url, summary FROM articles WHERE id > 3 ORDER BY id").fetchall()
+    assert articles == [(5, 'https://b.com/post', 'A summary'), (6, 'https://b.com/other', None)]
+    aliases = dict(conn.execute("SELECT url, canonical_id FROM article_aliases").fetchall())
+    assert aliases == {'https://b.com/post?utm_source=rss': 5, 'https://b.com/post/': 5,
+                       'https://b.com/other#top': 6}
+    stored = json.loads(conn.execute("SELECT summary_text FROM summaries").fetchone()[0])
+    assert stored['trends'][0]['article_ids'] == [1, 5, 6]
+    assert conn.execute("SELECT article_ids FROM summary_coverage").fetchone()[0] == '[5, 6]'
+    assert search(conn, 'post') == [5]
+    check_index(conn)
+    conn.close()
@@ -0,0 +1,59 @@
+import os
+import sqlite3
+import pytest
+from backend import api, summarizer
+from backend.database import init_db
+from helpers import load_script
+
+TEST_DB = 'test_query_plans.db'
+
+static_data = load_script('generate_static_data')
+
+# Hot queries with representative parameters. FTS5 search is left out: ranking
+# by bm25 always sorts the matches.
+HOT_QUERIES = {
+    'api articles (offset)': (api.ARTICLES_OFFSET_QUERY, ('2024-01-01', 20, 40)),
+    'api articles (keyset)': (api.ARTICLES_KEYSET_QUERY, ('2024-01-01', '2024-06-01 00:00:00', 500, 20)),
+    'api summary': (api.SUMMARY_QUERY, ('30d',)),
+    'summarizer queue': (summarizer.UNSUMMARIZED_QUERY + ' LIMIT ?', (50,)),
+    'summarizer queue (drain)': (summarizer.UNSUMMARIZED_QUERY, ()),
+    'trend window': (summarizer.WINDOW_QUERY, ('2024-01-01',)),
+    'static export': (static_data.ARTICLE_QUERY + ' ORDER BY published_at DESC, id DESC', ()),
+    'ingest url lookup': ("SELECT url FROM articles WHERE url IN (?, ?)", ('https://a.com/1', 'https://a.com/2')),
+    'db generation': ("SELECT value FROM meta WHERE key = 'generation'", ()),
+}
+
+def populate(conn, n=500):
+    sources = ['Anthropic', 'OpenAI', 'Google DeepMind', 'Meta AI', 'NVIDIA']
+    conn.executemany(
+        "INSERT INTO articles (url, title, published_at, source_type, source_name, summary) "
+        "VALUES (?, ?, ?, 'blog', ?, ?)",
+        [(f'https://a.com/{i}', f'Title {i}', f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00',
+          sources[i % len(sources)], None if i % 10 == 0 else f'Summary {i}') for i in range(n)])
+    conn.execute("INSERT INTO article_content (article_id, body) SELECT id, printf('%.2000c', 'x') FROM articles")
+    conn.executemany("INSERT INTO summaries (timeframe, summary_text, article_count) VALUES (?, '{}', 1)",
+                     [(t,) for t in ('1d', '7d', '30d', '1y') for _ in range(5)])
+    conn.commit()
+    conn.execute('ANALYZE')
+
+@pytest.fixture(params=['empty', 'analyzed'])
+def conn(request):
+    init_db(TEST_DB)
+    conn = sqlite3.connect(TEST_DB)
+    if request.param == 'analyzed':
+        populate(conn)
+    yield conn
+    conn.close()
+    os.remove(TEST_DB)
+
+def plan(conn, sql, params):
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_index(conn, name):
+    sql, params = HOT_QUERIES[name]
+    steps = plan(conn, sql, params)
+    # Scanning an index (e.g. the partial unsummarized index) is fine; a bare
+    # table scan or a sort into a temp B-tree is not.
+    assert not [s for s in steps if s.startswith('SCAN') and ' USING ' not in s], steps
+    assert not [s for s in steps if 'TEMP B-TREE' in s], steps
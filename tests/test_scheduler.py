@@ -0,0 +1,75 @@
+import datetime
+import os
+import sqlite3
+import unittest
+from unittest.mock import patch
+from backend.database import init_db
+from backend.scheduler import (learned_interval, backoff_interval, due_sources, run_due,
+                               MIN_INTERVAL, MAX_BACKOFF)
+from backend.sources import Source
+
+TEST_DB = 'test_scheduler.db'
+NOW = datetime.datetime(2024, 6, 1, 12, 0, 0)
+
+HOT = Source('Hot', 'rss', 'https://hot.example.com/feed', 'rss', fetch_interval=3600)
+COLD = Source('Cold', 'rss', 'https://cold.example.com/feed', 'rss', fetch_interval=7200)
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        init_db(TEST_DB)
+        self.conn = sqlite3.connect(TEST_DB)
+
+    def tearDown(self):
+        self.conn.close()
+        if os.path.exists(TEST_DB):
+            os.remove(TEST_DB)
+
+    def add_articles(self, source_name, hours_apart, count):
+        for i in range(count):
+            self.conn.execute('''INSERT INTO articles (url, title, published_at, source_name)
+                                 VALUES (?, ?, ?, ?)''',
+                              (f'https://{source_name}.com/{i}', 'T',
+                               NOW - datetime.timedelta(hours=hours_apart * i), source_name))
+        self.conn.commit()
+
+    def test_learned_interval_follows_publish_rate(self):
+        self.add_articles('Hot', hours_apart=8, count=10)
+        # Median gap of 8h, polled 4 times per gap
+        self.assertEqual(learned_interval(self.conn.cursor(), HOT), 2 * 3600)
+
+    def test_learned_interval_clamps_and_falls_back(self):
+        self.add_articles('Hot', hours_apart=0.1, count=10)
+        self.assertEqual(learned_interval(self.conn.cursor(), HOT), MIN_INTERVAL)
+        # No history: configured interval
+        self.assertEqual(learned_interval(self.conn.cursor(), COLD), 7200)
+
+    def test_backoff_doubles_and_caps(self):
+        self.assertEqual(backoff_interval(600, 1), 1200)
+        self.assertEqual(backoff_interval(600, 3), 4800)
+        self.assertEqual(backoff_interval(600, 20), MAX_BACKOFF)
+
+    @patch('backend.scheduler.scrape_sources')
+    def test_run_due_reschedules_and_backs_off(self, mock_scrape):
+        mock_scrape.return_value = {'Hot': 2, 'Cold': TimeoutError('slow')}
+
+        wait = run_due(db_path=TEST_DB, sources=[HOT, COLD], now=NOW)
+        self.assertEqual(wait, 3600)
+
+        c = self.conn.cursor()
+        c.execute("SELECT source, interval_seconds, consecutive_failures, last_error FROM source_schedule ORDER BY source")
+        rows = c.fetchall()
+        self.assertEqual(rows[0], ('Cold', 14400, 1, 'slow'))
+        self.assertEqual(rows[1], ('Hot', 3600, 0, None))
+
+        # Neither source is due a minute later; Hot is due after an hour
+        self.assertEqual(due_sources(c, [HOT, COLD], NOW + datetime.timedelta(minutes=1)), [])
+        self.assertEqual(due_sources(c, [HOT, COLD], NOW + datetime.timedelta(hours=1)), [HOT])
+
+        mock_scrape.reset_mock()
+        mock_scrape.return_value = {'Hot': 0}
+        run_due(db_path=TEST_DB, sources=[HOT, COLD], now=NOW + datetime.timedelta(hours=1))
+        self.assertEqual([s.name for s in mock_scrape.call_args[0][0]], ['Hot'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
+import asyncio
+import concurrent.futures
 import unittest
 from unittest.mock import patch, MagicMock
-from backend.scraper import scrape_blogs
+import httpx
+from backend.scraper import scrape_blogs, fetch_sources, parse_source, FetchResult
+from backend.sources import Source
 import sqlite3
 import os
 
@@ -58,5 +62,153 @@ class TestScraper(unittest.TestCase):
         # Should have 4 rows
         self.assertEqual(len(rows), 4)
 
+class TestFetchSources(unittest.TestCase):
+
+    def test_limits_concurrency_per_host(self):
+        in_flight = {'now': 0, 'max': 0}
+
+        async def handler(request):
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            await asyncio.sleep(0.01)
+            in_flight['now'] -= 1
+            return httpx.Response(200, text=f"body {request.url.path}")
+
+        sources = {f"feed{i}": f"https://example.com/feed{i}" for i in range(6)}
+        results = asyncio.run(fetch_sources(sources, per_host_limit=2,
+                                            transport=httpx.MockTransport(handler)))
+
+        self.assertEqual(results['feed3'].body, 'body /feed3')
+        self.assertEqual(in_flight['max'], 2)
+
+    def test_failures_and_deadline_map_to_exceptions(self):
+        async def handler(request):
+            if request.url.host == 'slow.example.com':
+                await asyncio.sleep(5)
+            if request.url.host == 'broken.example.com':
+                return httpx.Response(500)
+            return httpx.Response(200, text='ok')
+
+        sources = {
+            'ok': 'https://ok.example.com/feed',
+            'slow': 'https://slow.example.com/feed',
+            'broken': 'https://broken.example.com/feed',
+        }
+        results = asyncio.run(fetch_sources(sources, deadline=0.2,
+                                            transport=httpx.MockTransport(handler)))
+
+        self.assertEqual(results['ok'].body, 'ok')
+        self.assertIsInstance(results['slow'], asyncio.TimeoutError)
+        self.assertIsInstance(results['broken'], httpx.HTTPStatusError)
+
+    def test_sends_validators_and_reports_not_modified(self):
+        async def handler(request):
+            if request.headers.get('If-None-Match') == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, text='fresh', headers={'ETag': '"v2"'})
+
+        sources = {'cached': 'https://a.example.com/feed', 'new': 'https://b.example.com/feed'}
+        validators = {'cached': {'etag': '"v1"', 'last_modified': None}}
+        results = asyncio.run(fetch_sources(sources, validators=validators,
+                                            transport=httpx.MockTransport(handler)))
+
+        self.assertTrue(results['cached'].not_modified)
+        self.assertIsNone(results['cached'].body)
+        self.assertEqual(results['cached'].etag, '"v1"')
+        self.assertFalse(results['new'].not_modified)
+        self.assertEqual(results['new'].etag, '"v2"')
+
+    def test_parse_stage_has_its_own_timeout(self):
+        async def handler(request):
+            return httpx.Response(200, text=request.url.host)
+
+        async def parse(name, result):
+            # Slower than the fetch deadline; 'stuck' also misses the parse timeout
+            await asyncio.sleep(5 if name == 'stuck' else 0.3)
+            return [result.body]
+
+        sources = {'slow_parse': 'https://a.example.com/feed', 'stuck': 'https://b.example.com/feed'}
+        results = asyncio.run(fetch_sources(sources, deadline=0.1, parse=parse, parse_timeout=0.6,
+                                            transport=httpx.MockTransport(handler)))
+
+        self.assertEqual(results['slow_parse'].rows, ['a.example.com'])
+        # A parse that overruns leaves the fetched body for the writer to parse inline
+        self.assertIsInstance(results['stuck'], FetchResult)
+        self.assertIsNone(results['stuck'].rows)
+        self.assertEqual(results['stuck'].body, 'b.example.com')
+
+
+class TestValidatorCache(unittest.TestCase):
+
+    def tearDown(self):
+        if os.path.exists(TEST_DB):
+            os.remove(TEST_DB)
+
+    @patch('backend.scraper.feedparser.parse')
+    @patch('backend.scraper.fetch_sources')
+    def test_unchanged_sources_are_not_parsed(self, mock_fetch, mock_parse):
+        fetched = FetchResult('<rss/>', 'hash-1', '"etag-1"', None, False)
+
+        async def fake_fetch(sources, validators=None, **kwargs):
+            fake_fetch.validators = validators
+            return {name: fetched for name in sources}
+
+        mock_fetch.side_effect = fake_fetch
+        mock_parse.return_value = MagicMock(bozo=0, entries=[])
+
+        scrape_blogs(db_path=TEST_DB)
+        self.assertEqual(mock_parse.call_count, 4)
+
+        # Second cycle: same bytes come back, so nothing is parsed again
+        mock_parse.reset_mock()
+        scrape_blogs(db_path=TEST_DB)
+        mock_parse.assert_not_called()
+        self.assertEqual(fake_fetch.validators['OpenAI']['etag'], '"etag-1"')
+
+    @patch('backend.scraper.feedparser.parse')
+    @patch('backend.scraper.fetch_sources')
+    def test_timed_out_feeds_are_not_refetched(self, mock_fetch, mock_parse):
+        sources = [Source('Slow', 'rss', 'https://slow.example/feed', 'rss'),
+                   Source('Broken', 'rss', 'https://broken.example/feed', 'rss')]
+
+        async def fake_fetch(urls, **kwargs):
+            return {'Slow': asyncio.TimeoutError("fetch deadline of 60.0s exceeded"),
+                    'Broken': httpx.ConnectError("refused")}
+
+        mock_fetch.side_effect = fake_fetch
+        mock_parse.return_value = MagicMock(bozo=0, entries=[])
+
+        scrape_blogs(db_path=TEST_DB, sources=sources)
+        # Only the connection failure falls back to feedparser's own fetch
+        mock_parse.assert_called_once_with('https://broken.example/feed')
+
+RSS_BODY = '''<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Feed</title>
+<item><title>Pool Article</title><link>https://example.com/pool</link>
+<description>Body</description><pubDate>Mon, 01 Jan 2024 12:00:00 GMT</pubDate></item>
+</channel></rss>'''
+
+ANTHROPIC_BODY = '''<html><body>
+<a class="listItem_x" href="/news/claude"><span class="title_y">Introducing Claude</span></a>
+<a class="listItem_x" href="/legal/terms"><span class="title_y">Terms</span></a>
+</body></html>'''
+
+class TestParseStage(unittest.TestCase):
+
+    def test_parse_source_in_process_pool(self):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+            rss_source = Source('Example', 'rss', 'https://example.com/feed', 'rss')
+            html_source = Source('Anthropic', 'html', 'https://www.anthropic.com/news', 'anthropic_html')
+            rss = executor.submit(parse_source, rss_source, RSS_BODY).result()
+            html = executor.submit(parse_source, html_source, ANTHROPIC_BODY).result()
+
+        self.assertEqual(len(rss), 1)
+        url, title, content, published_at, source_type, source_name = rss[0]
+        self.assertEqual((url, title, source_name), ('https://example.com/pool', 'Pool Article', 'Example'))
+        self.assertEqual(published_at.year, 2024)
+
+        self.assertEqual([(row[0], row[1]) for row in html],
+                         [('https://www.anthropic.com/news/claude', 'Introducing Claude')])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,89 @@
+import json
+import os
+import unittest
+from backend.sources import Source, load_sources
+from backend.scraper import parse_source
+
+TEST_CONFIG = 'test_sources.json'
+
+class TestLoadSources(unittest.TestCase):
+
+    def tearDown(self):
+        if os.path.exists(TEST_CONFIG):
+            os.remove(TEST_CONFIG)
+
+    def write_config(self, sources):
+        with open(TEST_CONFIG, 'w') as f:
+            json.dump({'sources': sources}, f)
+
+    def test_default_registry(self):
+        sources = load_sources()
+        names = [s.name for s in sources]
+        self.assertEqual(names[0], 'Anthropic')
+        self.assertEqual(len([s for s in sources if s.type == 'rss']), 4)
+        self.assertNotIn('Anthropic (RSS mirror)', names)
+
+    def test_defaults_and_priority_order(self):
+        self.write_config([
+            {'name': 'Cold', 'type': 'json', 'url': 'https://cold.example.com/api', 'priority': 1},
+            {'name': 'Hot', 'type': 'html', 'url': 'https://hot.example.com/', 'priority': 9,
+             'fetch_interval': 600},
+            {'name': 'Off', 'type': 'rss', 'url': 'https://off.example.com/feed', 'enabled': False},
+        ])
+        sources = load_sources(TEST_CONFIG)
+        self.assertEqual([s.name for s in sources], ['Hot', 'Cold'])
+        self.assertEqual(sources[0].parser, 'html_selector')
+        self.assertEqual(sources[0].fetch_interval, 600)
+        self.assertEqual(sources[1].parser, 'json_api')
+        self.assertEqual(len(load_sources(TEST_CONFIG, include_disabled=True)), 3)
+
+    def test_rejects_invalid_entries(self):
+        self.write_config([{'name': 'Bad', 'type': 'ftp', 'url': 'ftp://example.com'}])
+        with self.assertRaises(ValueError):
+            load_sources(TEST_CONFIG)
+
+        self.write_config([{'name': 'A', 'type': 'rss', 'url': 'https://a.com/feed'},
+                           {'name': 'A', 'type': 'rss', 'url': 'https://b.com/feed'}])
+        with self.assertRaises(ValueError):
+            load_sources(TEST_CONFIG)
+
+
+class TestGenericParsers(unittest.TestCase):
+
+    def test_html_selector(self):
+        source = Source('Lab', 'html', 'https://lab.example.com/blog', 'html_selector', options={
+            'item_selector': 'article.post',
+            'link_selector': 'a',
+            'title_selector': 'h2',
+            'exclude': ['/careers'],
+        })
+        body = '''
+            <article class="post"><a href="/blog/one"><h2>Post One</h2></a><time>2024-03-01</time></article>
+            <article class="post"><a href="/careers"><h2>Join us</h2></a></article>
+            <article class="post"><a href="https://lab.example.com/blog/two"><h2> Post Two </h2></a></article>
+        '''
+        rows = parse_source(source, body)
+        self.assertEqual([(r[0], r[1]) for r in rows], [
+            ('https://lab.example.com/blog/one', 'Post One'),
+            ('https://lab.example.com/blog/two', 'Post Two'),
+        ])
+        self.assertEqual(rows[0][3].month, 3)
+        self.assertEqual(rows[0][5], 'Lab')
+
+    def test_json_api(self):
+        source = Source('Api', 'json', 'https://api.example.com/v1/posts', 'json_api', options={
+            'items_path': 'data.posts',
+            'fields': {'url': 'permalink', 'title': 'meta.title', 'published_at': 'date'},
+        })
+        body = json.dumps({'data': {'posts': [
+            {'permalink': '/p/1', 'meta': {'title': 'First'}, 'date': '2024-05-02T10:00:00'},
+            {'permalink': '/p/2', 'meta': {}},
+        ]}})
+        rows = parse_source(source, body)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], 'https://api.example.com/p/1')
+        self.assertEqual(rows[0][1], 'First')
+        self.assertEqual(rows[0][3].day, 2)
+
+if __name__ == '__main__':
+    unittest.main()
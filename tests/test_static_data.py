@@ -0,0 +1,162 @@
+import itertools
+import json
+import os
+import shutil
+from datetime import datetime
+import pytest
+from backend.database import init_db, get_db_connection
+from helpers import load_script
+
+TEST_DB = 'test_static_data.db'
+SHARD_DIR = 'test_static_shards'
+NOW = datetime(2024, 3, 15, 12, 0, 0)
+
+static_data = load_script('generate_static_data')
+
+def add_article(url, published):
+    conn = get_db_connection(TEST_DB)
+    conn.execute("INSERT INTO articles (url, title, published_at, source_type, source_name) "
+                 "VALUES (?, 'Title', ?, 'blog', 'OpenAI')", (url, published))
+    conn.commit()
+    conn.close()
+
+@pytest.fixture
+def db():
+    init_db(TEST_DB)
+    add_article('https://a.com/1', '2024-03-14 09:00:00')
+    add_article('https://a.com/2', '2024-03-01 09:00:00')
+    add_article('https://a.com/3', '2024-01-20 09:00:00')
+    yield TEST_DB
+    os.remove(TEST_DB)
+    shutil.rmtree(SHARD_DIR, ignore_errors=True)
+
+def read_shard(entry):
+    with open(os.path.join(SHARD_DIR, entry['file'])) as f:
+        return json.load(f)
+
+def test_sharded_snapshot_layout(db):
+    manifest = static_data.generate_sharded_data(db, SHARD_DIR, now=NOW)
+
+    assert manifest['timeframes']['7d']['count'] == 1
+    assert manifest['timeframes']['30d']['count'] == 2
+    assert sorted(manifest['months']) == ['2024-01', '2024-03']
+    assert [a['url'] for a in read_shard(manifest['timeframes']['7d'])['articles']] == ['https://a.com/1']
+    assert [a['url'] for a in read_shard(manifest['months']['2024-03'])['articles']] == \
+        ['https://a.com/1', 'https://a.com/2']
+    assert manifest['months']['2024-03']['file'].startswith('2024-03.')
+    with open(os.path.join(SHARD_DIR, 'manifest.json')) as f:
+        assert json.load(f) == manifest
+
+def test_sharded_snapshot_only_rewrites_changed_shards(db):
+    before = static_data.generate_sharded_data(db, SHARD_DIR, now=NOW)
+    january = os.path.join(SHARD_DIR, before['months']['2024-01']['file'])
+    os.utime(january, (0, 0))
+
+    add_article('https://a.com/4', '2024-03-15 08:00:00')
+    after = static_data.generate_sharded_data(db, SHARD_DIR, now=NOW)
+
+    assert after['months']['2024-01'] == before['months']['2024-01']
+    assert os.path.getmtime(january) == 0
+    assert after['months']['2024-03']['count'] == 3
+    # The superseded March shard is gone, the new one is in place
+    assert not os.path.exists(os.path.join(SHARD_DIR, before['months']['2024-03']['file']))
+    assert os.path.exists(os.path.join(SHARD_DIR, after['months']['2024-03']['file']))
+
+def test_sharded_snapshot_removes_empty_months(db):
+    before = static_data.generate_sharded_data(db, SHARD_DIR, now=NOW)
+    conn = get_db_connection(db)
+    conn.execute("DELETE FROM articles WHERE url = 'https://a.com/3'")
+    conn.commit()
+    conn.close()
+
+    after = static_data.generate_sharded_data(db, SHARD_DIR, now=NOW)
+    assert '2024-01' not in after['months']
+    assert not os.path.exists(os.path.join(SHARD_DIR, before['months']['2024-01']['file']))
+
+def test_streaming_export_matches_rows(db, monkeypatch):
+    monkeypatch.setattr(static_data, 'FETCH_CHUNK', 2)
+    output = os.path.join(SHARD_DIR, 'data.json')
+    assert static_data.generate_static_data(db, output) == 3
+
+    with open(output, 'rb') as f:
+        body = f.read()
+    data = json.loads(body)
+    assert [a['url'] for a in data['articles']] == ['https://a.com/1', 'https://a.com/2', 'https://a.com/3']
+    assert b'\n' not in body
+    assert not [name for name in os.listdir(SHARD_DIR) if name.endswith('.tmp')]
+
+def test_atomic_output_keeps_old_file_on_error(db):
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    path = os.path.join(SHARD_DIR, 'data.json')
+    with open(path, 'w') as f:
+        f.write('old')
+    with pytest.raises(ValueError):
+        with static_data.atomic_output(path) as write:
+            write(b'{"partial":')
+            raise ValueError('boom')
+    with open(path) as f:
+        assert f.read() == 'old'
+    assert os.listdir(SHARD_DIR) == ['data.json']
+
+def decode(data):
+    columns, dicts = data['columns'], data['dicts']
+    return [{'id': columns['id'][i], 'url': columns['url'][i], 'source': dicts['source'][columns['source'][i]],
+             'type': dicts['type'][columns['type'][i]],
+             'published': datetime.utcfromtimestamp(columns['published'][i]).strftime('%Y-%m-%d %H:%M:%S')}
+            for i in range(data['count'])]
+
+def test_columnar_export_round_trips(db):
+    rows_path = os.path.join(SHARD_DIR, 'rows.json')
+    columnar_path = os.path.join(SHARD_DIR, 'columnar.json')
+    static_data.generate_static_data(db, rows_path)
+    static_data.generate_static_data(db, columnar_path, columnar=True)
+
+    with open(rows_path) as f:
+        rows = json.load(f)['articles']
+    with open(columnar_path) as f:
+        data = json.load(f)
+    assert data['format'] == static_data.COLUMNAR_FORMAT
+    assert data['dicts'] == {'source': ['OpenAI'], 'type': ['blog']}
+    assert decode(data) == [{key: a[key] for key in ('id', 'url', 'source', 'type', 'published')} for a in rows]
+
+def test_columnar_columns_share_one_snapshot(db):
+    chunks = []
+
+    def write(data):
+        chunks.append(data)
+        if data == b']' and chunks.count(b']') == 1:
+            # A scraper commits between the first and second column
+            add_article('https://a.com/4', '2024-03-15 09:00:00')
+
+    conn = get_db_connection(db)
+    count, _ = static_data._write_columns(conn.cursor(), write)
+    conn.close()
+    columns = json.loads(b'{' + b''.join(chunks) + b'}')
+    assert count == 3
+    assert all(len(values) == 3 for values in columns.values())
+
+def test_columnar_shards(db):
+    manifest = static_data.generate_sharded_data(db, SHARD_DIR, now=NOW)
+    rows = read_shard(manifest['months']['2024-03'])['articles']
+    columnar = static_data.generate_sharded_data(db, SHARD_DIR, now=NOW, columnar=True)
+
+    assert columnar['format'] == static_data.COLUMNAR_FORMAT
+    shard = read_shard(columnar['months']['2024-03'])
+    assert [a['url'] for a in decode(shard)] == ['https://a.com/1', 'https://a.com/2']
+    assert shard == static_data.encode_columnar(rows)
+
+def test_search_index_shard(db):
+    conn = get_db_connection(db)
+    conn.execute("UPDATE articles SET title = 'Safety report', summary = 'Teen safety' WHERE url = 'https://a.com/2'")
+    conn.commit()
+    conn.close()
+
+    manifest = static_data.generate_sharded_data(db, SHARD_DIR, now=NOW)
+    index = read_shard(manifest['search'])
+    assert index['format'] == static_data.SEARCH_FORMAT
+    assert [index['months'][m] for m in index['month']] == ['2024-03', '2024-03', '2024-01']
+
+    # Postings are delta-encoded positions into the newest-first id list
+    positions = list(itertools.accumulate(index['terms']['title']))
+    assert [index['ids'][p] for p in positions] == [1, 3]
+    assert [index['ids'][p] for p in index['terms']['safety']] == [2]
@@ -1,6 +1,7 @@
+import json
 import unittest
-from unittest.mock import patch, MagicMock
-from backend.summarizer import generate_summary
+from unittest.mock import patch, MagicMock, AsyncMock
+from backend.summarizer import generate_summary, generate_article_summaries
 import sqlite3
 import os
 
@@ -57,5 +58,99 @@ class TestSummarizer(unittest.TestCase):
         # Schema: id, timeframe, summary_text, article_count, ...
         # id=1, timeframe='1d', summary_text='...', count=1
 
+    @patch('backend.summarizer.ollama.chat')
+    def test_generate_summary_skips_unchanged_window(self, mock_chat):
+        mock_chat.return_value = {'message': {'content': 'This is a test summary.'}}
+
+        generate_summary(1, db_path=TEST_DB)
+        summary = generate_summary(1, db_path=TEST_DB)
+
+        self.assertEqual(summary, 'This is a test summary.')
+        self.assertEqual(mock_chat.call_count, 1)
+
+    @patch('backend.summarizer.ollama.chat')
+    def test_generate_summary_folds_new_articles_into_trends(self, mock_chat):
+        first = {'trends': [{'name': 'Agents', 'summary': 'Agents everywhere.', 'article_ids': [1]}]}
+        mock_chat.return_value = {'message': {'content': json.dumps(first)}}
+        generate_summary(30, db_path=TEST_DB)
+
+        c = self.conn.cursor()
+        c.execute("INSERT INTO articles (url, title, published_at, source_name) VALUES (?, ?, datetime('now'), ?)",
+                  ('http://test2.com', 'Article 2', 'Source B'))
+        self.conn.commit()
+
+        update = {'trends': [
+            {'name': 'agents', 'summary': 'Agents keep shipping.', 'article_ids': [2, 99]},
+            {'name': 'Hallucinated', 'summary': 'Nothing real.', 'article_ids': [1234]},
+        ]}
+        mock_chat.return_value = {'message': {'content': json.dumps(update)}}
+        summary = json.loads(generate_summary(30, db_path=TEST_DB))
+
+        # Only the new article was sent to the model
+        prompt = mock_chat.call_args.kwargs['messages'][0]['content']
+        self.assertIn('[2] Article 2', prompt)
+        self.assertNotIn('[1] Article 1', prompt)
+        self.assertEqual(summary['trends'], [
+            {'name': 'Agents', 'summary': 'Agents keep shipping.', 'article_ids': [1, 2]},
+        ])
+
+    @patch('backend.summarizer.ollama.AsyncClient')
+    def test_generate_article_summaries_batched(self, mock_client_cls):
+        c = self.conn.cursor()
+        for i in range(2, 6):
+            c.execute("INSERT INTO articles (url, title, content, published_at, source_name) VALUES (?, ?, ?, datetime('now'), ?)",
+                      (f'http://test{i}.com', f'Article {i}', f'Content {i}', 'Source A'))
+        self.conn.commit()
+
+        async def fake_chat(model, messages, format=''):
+            prompt = messages[0]['content']
+            if format == 'json':
+                # Answer every packed item except article 2, which must be retried alone
+                ids = [int(line[1:line.index(']')]) for line in prompt.splitlines() if line.startswith('[')]
+                summaries = [{'id': i, 'summary': f'Batch summary {i}.'} for i in ids if i != 2]
+                return {'message': {'content': json.dumps({'summaries': summaries})}}
+            return {'message': {'content': ' Single summary. '}}
+
+        mock_client_cls.return_value.chat = AsyncMock(side_effect=fake_chat)
+
+        count = generate_article_summaries(db_path=TEST_DB, concurrency=2, batch_size=2, commit_every=3)
+        self.assertEqual(count, 5)
+
+        c.execute("SELECT id, summary FROM articles ORDER BY id")
+        summaries = dict(c.fetchall())
+        self.assertEqual(summaries[2], 'Single summary.')
+        self.assertEqual(summaries[3], 'Batch summary 3.')
+        self.assertTrue(all(summaries.values()))
+
+    @patch('backend.trends.ollama.chat')
+    def test_ollama_outage_keeps_previous_trends(self, mock_trends_chat):
+        c = self.conn.cursor()
+        for i in range(2, 62):  # over PROMPT_ARTICLE_LIMIT: map-reduced over weekly buckets
+            c.execute("INSERT INTO articles (url, title, content, published_at, source_name) "
+                      "VALUES (?, ?, '', datetime('now', ?), 'Source A')", (f'http://t{i}.com', f'Article {i}', f'-{i} days'))
+        self.conn.commit()
+
+        mock_trends_chat.side_effect = ConnectionError("ollama is down")
+        self.assertIsNone(generate_summary(365, db_path=TEST_DB))
+        c.execute("SELECT COUNT(*) FROM summaries")
+        self.assertEqual(c.fetchone()[0], 0)
+        c.execute("SELECT COUNT(*) FROM summary_coverage")
+        self.assertEqual(c.fetchone()[0], 0)
+
+        # Back up: the window is summarized instead of being treated as covered
+        def fake_chat(model, messages, format=''):
+            prompt = messages[0]['content']
+            if 'source_trends' in prompt:
+                trends = [{'name': 'All', 'summary': 'Everything.', 'source_trends': [1]}]
+            else:
+                ids = [int(line.strip()[1:line.strip().index(']')]) for line in prompt.splitlines()
+                       if line.strip().startswith('[') and ']' in line]
+                trends = [{'name': 'Week', 'summary': 'Stuff.', 'article_ids': ids}]
+            return {'message': {'content': json.dumps({'trends': trends})}}
+        mock_trends_chat.side_effect = fake_chat
+        summary = json.loads(generate_summary(365, db_path=TEST_DB))
+        self.assertTrue(summary['trends'])
+        self.assertTrue(mock_trends_chat.called)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import unittest
+from unittest.mock import patch, AsyncMock
+from backend.database import init_db
+from backend import summary_cache
+from backend.content import store_content
+from backend.summarizer import generate_article_summaries
+
+TEST_DB = 'test_summary_cache.db'
+
+class TestSummaryCache(unittest.TestCase):
+
+    def setUp(self):
+        init_db(TEST_DB)
+        self.conn = sqlite3.connect(TEST_DB)
+
+    def tearDown(self):
+        self.conn.close()
+        if os.path.exists(TEST_DB):
+            os.remove(TEST_DB)
+
+    def add_article(self, url, title, content):
+        c = self.conn.execute('''INSERT INTO articles (url, title, published_at, source_name)
+                                 VALUES (?, ?, datetime('now'), 'Source')''', (url, title))
+        store_content(c, [(c.lastrowid, content)])
+        self.conn.commit()
+
+    def test_key_normalizes_case_and_whitespace(self):
+        a = summary_cache.cache_key('m', 'tpl', 'Big  News', 'Some\ncontent ')
+        b = summary_cache.cache_key('m', 'tpl', 'big news', 'some content')
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, summary_cache.cache_key('other-model', 'tpl', 'big news', 'some content'))
+
+    def test_evicts_least_recently_used(self):
+        summary_cache.store(self.conn, [('old', 'x' * 60), ('new', 'y' * 60)])
+        self.conn.execute("UPDATE summary_cache SET last_used_at = '2000-01-01' WHERE key = 'old'")
+        self.conn.commit()
+
+        removed = summary_cache.evict(self.conn, max_bytes=100)
+        self.assertEqual(removed, 1)
+        self.assertEqual(summary_cache.lookup(self.conn, ['old', 'new']), {'new': 'y' * 60})
+
+    @patch('backend.summarizer.ollama.AsyncClient')
+    def test_duplicates_and_cache_hits_skip_the_llm(self, mock_client_cls):
+        chat = AsyncMock(return_value={'message': {'content': 'One summary.'}})
+        mock_client_cls.return_value.chat = chat
+
+        self.add_article('https://a.com/story', 'Big News', 'Same body')
+        self.add_article('http://a.com/story?utm_source=x', 'Big News', 'Same body')
+        self.assertEqual(generate_article_summaries(db_path=TEST_DB), 2)
+        self.assertEqual(chat.await_count, 1)
+
+        # A later syndicated copy is answered straight from the cache
+        self.add_article('https://mirror.com/story', 'big news', 'Same  body')
+        self.assertEqual(generate_article_summaries(db_path=TEST_DB), 1)
+        self.assertEqual(chat.await_count, 1)
+
+        summaries = [row[0] for row in self.conn.execute("SELECT summary FROM articles")]
+        self.assertEqual(summaries, ['One summary.'] * 3)
+
+if __name__ == '__main__':
+    unittest.main()
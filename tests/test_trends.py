@@ -0,0 +1,85 @@
+import datetime
+import json
+import os
+import re
+import sqlite3
+import unittest
+from unittest.mock import patch
+from backend.database import init_db
+from backend.trends import make_buckets, map_reduce_trends, PROMPT_ARTICLE_LIMIT
+
+TEST_DB = 'test_trends.db'
+START = datetime.datetime(2024, 1, 1, 9, 0, 0)
+
+def make_articles(count, hours_apart):
+    return [{'id': i + 1, 'title': f'Article {i + 1}',
+             'published_at': str(START + datetime.timedelta(hours=hours_apart * i))}
+            for i in range(count)]
+
+def fake_chat(model, messages, format=''):
+    prompt = messages[0]['content']
+    if 'source_trends' in prompt:
+        numbers = [int(n) for n in re.findall(r'^\s*\[(\d+)\]', prompt, re.M)]
+        trends = [{'name': 'Everything', 'summary': 'All of it.', 'source_trends': numbers + [999]}]
+    else:
+        ids = [int(n) for n in re.findall(r'^\s*\[(\d+)\]', prompt, re.M)]
+        trends = [{'name': f'Bucket of {ids[0]}', 'summary': 'Stuff.', 'article_ids': ids}]
+    return {'message': {'content': json.dumps({'trends': trends})}}
+
+class TestMapReduceTrends(unittest.TestCase):
+
+    def setUp(self):
+        init_db(TEST_DB)
+        self.conn = sqlite3.connect(TEST_DB)
+
+    def tearDown(self):
+        self.conn.close()
+        if os.path.exists(TEST_DB):
+            os.remove(TEST_DB)
+
+    def test_buckets_are_weekly_and_bounded(self):
+        # 200 articles published every hour: about 9 days
+        buckets = make_buckets(make_articles(200, 1), 365)
+        self.assertTrue(all(k.startswith('week:') for k in buckets))
+        self.assertTrue(all(len(v) <= PROMPT_ARTICLE_LIMIT for v in buckets.values()))
+        self.assertEqual(sum(len(v) for v in buckets.values()), 200)
+
+        daily = make_buckets(make_articles(10, 24), 30)
+        self.assertEqual(sorted(daily)[0], 'day:2024-01-01')
+        self.assertEqual(len(daily), 10)
+
+    @patch('backend.trends.ollama.chat', side_effect=fake_chat)
+    def test_map_reduce_covers_all_articles_and_reuses_buckets(self, mock_chat):
+        articles = make_articles(120, 12)  # 60 days, ~9 weekly buckets
+
+        result = json.loads(map_reduce_trends(self.conn, articles, 365, 'test-model'))
+        first_calls = mock_chat.call_count
+
+        self.assertEqual(len(result['trends']), 1)
+        self.assertEqual(sorted(result['trends'][0]['article_ids']), list(range(1, 121)))
+
+        # Second run: every bucket comes from trend_buckets, only the reduce call remains
+        mock_chat.reset_mock()
+        map_reduce_trends(self.conn, articles, 365, 'test-model')
+        self.assertEqual(mock_chat.call_count, 1)
+        self.assertGreater(first_calls, 1)
+
+    @patch('backend.trends.ollama.chat')
+    def test_failed_bucket_fails_the_run_but_keeps_the_rest(self, mock_chat):
+        articles = make_articles(120, 12)
+        first_bucket = sorted(make_buckets(articles, 365))[0]
+
+        def flaky_chat(model, messages, format=''):
+            if '[1] Article 1' in messages[0]['content']:
+                raise ConnectionError("ollama is down")
+            return fake_chat(model, messages, format)
+        mock_chat.side_effect = flaky_chat
+
+        with self.assertRaises(RuntimeError):
+            map_reduce_trends(self.conn, articles, 365, 'test-model')
+        cached = {row[0] for row in self.conn.execute("SELECT bucket FROM trend_buckets")}
+        self.assertNotIn(first_bucket, cached)
+        self.assertEqual(len(cached), len(make_buckets(articles, 365)) - 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import pytest
+from backend.urls import canonicalize_url
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://Example.COM/Post/', 'https://example.com/Post'),
+    ('https://example.com:443/a', 'https://example.com/a'),
+    ('http://example.com:8080/a', 'http://example.com:8080/a'),
+    ('https://example.com/a?utm_source=rss&utm_medium=feed', 'https://example.com/a'),
+    ('https://example.com/a?b=2&a=1&fbclid=x#section', 'https://example.com/a?a=1&b=2'),
+    ('https://example.com', 'https://example.com/'),
+    ('mailto:news@example.com', 'mailto:news@example.com'),
+    ('/relative/path', '/relative/path'),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+def test_canonicalize_resolves_relative_links():
+    assert canonicalize_url('news/claude-3/', base_url='https://www.anthropic.com/') == \
+        'https://www.anthropic.com/news/claude-3'
+    assert canonicalize_url('/news/x', base_url='https://www.anthropic.com/blog/') == \
+        'https://www.anthropic.com/news/x'
+
+def test_canonicalize_is_idempotent():
+    url = canonicalize_url('https://Example.com/a/?z=1&utm_campaign=x&a=2')
+    assert canonicalize_url(url) == url
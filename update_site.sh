@@ -10,13 +10,13 @@ cd "$(dirname "$0")"
 
 # 1. Scrape new articles
 echo "--------------------------------"
-echo "📡 Step 1/4: Scraping latest news..."
+echo "📡 Step 1/5: Scraping latest news..."
 source backend/venv/bin/activate
 python -m backend.scraper
 
 # 2. Generate Summaries (requires Ollama running)
 echo "--------------------------------"
-echo "🧠 Step 2/4: Summarizing with Local LLM (Ollama)..."
+echo "🧠 Step 2/5: Summarizing with Local LLM (Ollama)..."
 # Check if Ollama is running
 if ! pgrep -x "ollama" > /dev/null; then
     echo "⚠️  Ollama is not running! Please start 'ollama serve' in another terminal."
@@ -24,14 +24,19 @@ if ! pgrep -x "ollama" > /dev/null; then
 fi
 python -m backend.summarizer
 
-# 3. Generate Static Data
+# 3. Archive old article bodies and compact the database
 echo "--------------------------------"
-echo "💾 Step 3/4: Generating static snapshot..."
-python scripts/generate_static_data.py
+echo "🗜️  Step 3/5: Archiving and compacting database..."
+python -m backend.maintenance
 
-# 4. Build Frontend
+# 4. Generate Static Data
 echo "--------------------------------"
-echo "🏗️  Step 4/4: Building static site..."
+echo "💾 Step 4/5: Generating static snapshot..."
+python scripts/generate_static_data.py --sharded --columnar
+
+# 5. Build Frontend
+echo "--------------------------------"
+echo "🏗️  Step 5/5: Building static site..."
 cd frontend
 npm run build
 
@@ -39,7 +44,7 @@ echo "--------------------------------"
 echo "✅ Update Complete!"
 echo "To publish the changes to GitHub Pages, run:"
 echo ""
-echo "   git add ."
+echo "   git add backend/data.db backend/archive frontend/public/data"
 echo "   git commit -m \"Daily update: $(date +'%Y-%m-%d')\""
 echo "   git push"
 echo ""